@@ -5,7 +5,7 @@ Currently supports Gemini, but designed to easily swap to GPT/Claude.
 """
 import os
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 from abc import ABC, abstractmethod
 import google.generativeai as genai
 from PIL import Image
@@ -16,6 +16,28 @@ if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
 
+def _context_json(context: Dict[str, Any]) -> str:
+    """Serialize database context compactly (no indentation) to save prompt tokens."""
+    return json.dumps(context, separators=(",", ":"), default=str)
+
+
+# Ends a text/plain stream that failed part-way, so clients can tell it apart
+# from model output (a 200 status is already sent by then)
+STREAM_ERROR_MARKER = "\n[[STREAM_ERROR]] "
+
+
+def _stream_text(response) -> Iterator[str]:
+    """Yield the text of each streamed Gemini chunk, skipping chunks without parts."""
+    for chunk in response:
+        parts = chunk.candidates[0].content.parts if chunk.candidates else None
+        if not parts:
+            # Safety-blocked or empty chunk; chunk.text would raise here
+            continue
+        text = "".join(part.text for part in parts if getattr(part, "text", None))
+        if text:
+            yield text
+
+
 class AIClient(ABC):
     """Abstract base class for AI clients."""
 
@@ -56,6 +78,38 @@ class AIClient(ABC):
         """Generate a response from the AI model using an image."""
         pass
 
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> Iterator[str]:
+        """
+        Yield the response in chunks as they are generated.
+
+        Default implementation yields the full response once; clients with
+        native streaming override this.
+        """
+        yield self.generate(prompt, system_prompt, context, temperature, max_tokens)
+
+    def generate_with_history_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> Iterator[str]:
+        """
+        Yield a multi-turn response in chunks as they are generated.
+
+        Default implementation yields the full response once; clients with
+        native streaming override this.
+        """
+        yield self.generate_with_history(messages, system_prompt, context, temperature, max_tokens)
+
 
 class GeminiClient(AIClient):
     """Gemini AI client implementation."""
@@ -84,7 +138,7 @@ class GeminiClient(AIClient):
         if context:
             parts.append("\n## Database Context (use ONLY this data for specific facts):\n")
             parts.append("```json")
-            parts.append(json.dumps(context, indent=2, default=str))
+            parts.append(_context_json(context))
             parts.append("```")
 
         parts.append(f"\n## User Question:\n{user_prompt}")
@@ -116,22 +170,46 @@ class GeminiClient(AIClient):
         except Exception as e:
             return f"Error generating response: {str(e)}"
 
-    def generate_with_history(
+    def generate_stream(
         self,
-        messages: List[Dict[str, str]],
+        prompt: str,
         system_prompt: str,
         context: Optional[Dict[str, Any]] = None,
         temperature: float = 0.7,
         max_tokens: int = 2048
-    ) -> str:
-        """Generate a response with conversation history."""
+    ) -> Iterator[str]:
+        """Stream a response from Gemini, yielding text chunks as they arrive."""
+        full_prompt = self._build_prompt(prompt, system_prompt, context)
+
+        generation_config = genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+
+        try:
+            response = self.model.generate_content(
+                full_prompt,
+                generation_config=generation_config,
+                stream=True
+            )
+            yield from _stream_text(response)
+        except Exception as e:
+            yield f"{STREAM_ERROR_MARKER}{str(e)}"
+
+    def _start_history_chat(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        context: Optional[Dict[str, Any]] = None
+    ):
+        """Start a Gemini chat seeded with all but the last message; return it with the last message."""
         # Build conversation for Gemini
         history = []
 
         # Add system prompt as first user message (Gemini doesn't have system role)
         context_block = ""
         if context:
-            context_block = f"\n\n## Database Context:\n```json\n{json.dumps(context, indent=2, default=str)}\n```"
+            context_block = f"\n\n## Database Context:\n```json\n{_context_json(context)}\n```"
 
         # Convert message history to Gemini format
         for i, msg in enumerate(messages[:-1]):  # All but last message
@@ -151,6 +229,19 @@ class GeminiClient(AIClient):
             # No history, include system prompt
             last_message = f"{system_prompt}{context_block}\n\nUser: {last_message}"
 
+        return chat, last_message
+
+    def generate_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> str:
+        """Generate a response with conversation history."""
+        chat, last_message = self._start_history_chat(messages, system_prompt, context)
+
         generation_config = genai.GenerationConfig(
             temperature=temperature,
             max_output_tokens=max_tokens,
@@ -165,6 +256,32 @@ class GeminiClient(AIClient):
         except Exception as e:
             return f"Error generating response: {str(e)}"
 
+    def generate_with_history_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> Iterator[str]:
+        """Stream a response with conversation history, yielding text chunks as they arrive."""
+        chat, last_message = self._start_history_chat(messages, system_prompt, context)
+
+        generation_config = genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+
+        try:
+            response = chat.send_message(
+                last_message,
+                generation_config=generation_config,
+                stream=True
+            )
+            yield from _stream_text(response)
+        except Exception as e:
+            yield f"{STREAM_ERROR_MARKER}{str(e)}"
+
     def generate_with_image(
         self,
         prompt: str,
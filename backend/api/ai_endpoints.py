@@ -3,11 +3,13 @@ AI Endpoints - FastAPI routes for AI chat and explanations.
 
 Endpoints:
 - POST /ai/chat - General chat with epigenetics assistant
+- POST /ai/chat/stream - Same as /ai/chat, streamed as plain text
 - POST /ai/explain-scorecard - Explain a drug-indication scorecard
 - POST /ai/explain-editing-asset - Explain an epigenetic editing asset
 """
 from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from backend.ai.client import get_ai_client
@@ -80,6 +82,30 @@ class EditingAssetResponse(BaseModel):
 # Endpoints
 # =========================================================================
 
+def _prepare_chat(request: ChatRequest):
+    """
+    Resolve entities, database context and message history for a chat request.
+
+    Returns (entities, context, messages); messages is None for a single
+    question without conversation history.
+    """
+    # Extract entities from question
+    if request.entity_refs:
+        entities = request.entity_refs
+    else:
+        entities = context_builder.extract_entities_from_question(request.question)
+
+    # Build context from database
+    context = context_builder.build_chat_context(request.question, entities)
+
+    messages = None
+    if request.conversation_history:
+        messages = [{"role": m.role, "content": m.content} for m in request.conversation_history]
+        messages.append({"role": "user", "content": request.question})
+
+    return entities, context, messages
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -96,22 +122,11 @@ async def chat(request: ChatRequest):
     - "List all Phase 3 epigenetic drugs"
     """
     ai_client = get_ai_client()
-
-    # Extract entities from question
-    if request.entity_refs:
-        entities = request.entity_refs
-    else:
-        entities = context_builder.extract_entities_from_question(request.question)
-
-    # Build context from database
-    context = context_builder.build_chat_context(request.question, entities)
+    entities, context, messages = _prepare_chat(request)
 
     # Generate response
-    if request.conversation_history:
+    if messages:
         # Multi-turn conversation
-        messages = [{"role": m.role, "content": m.content} for m in request.conversation_history]
-        messages.append({"role": "user", "content": request.question})
-
         answer = ai_client.generate_with_history(
             messages=messages,
             system_prompt=SYSTEM_PROMPTS["chat"],
@@ -134,6 +149,37 @@ async def chat(request: ChatRequest):
     )
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /ai/chat.
+
+    Returns the answer as text/plain chunks as Gemini generates them, so the
+    client can render the first tokens without waiting for the full reply.
+    If generation fails part-way, the body ends with STREAM_ERROR_MARKER
+    ("[[STREAM_ERROR]]" on its own line) followed by the error message.
+    """
+    ai_client = get_ai_client()
+    _, context, messages = _prepare_chat(request)
+
+    if messages:
+        chunks = ai_client.generate_with_history_stream(
+            messages=messages,
+            system_prompt=SYSTEM_PROMPTS["chat"],
+            context=context,
+            temperature=request.temperature
+        )
+    else:
+        chunks = ai_client.generate_stream(
+            prompt=request.question,
+            system_prompt=SYSTEM_PROMPTS["chat"],
+            context=context,
+            temperature=request.temperature
+        )
+
+    return StreamingResponse(chunks, media_type="text/plain")
+
+
 @router.post("/explain-scorecard", response_model=ScorecardResponse)
 async def explain_scorecard(request: ScorecardRequest):
     """
@@ -4,11 +4,12 @@ Clinical Trial Calendar API Endpoints
 Provides access to trial readout dates, phases, and status from ClinicalTrials.gov.
 Includes date confidence computation for UI indicators.
 """
+from collections import Counter
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List, Literal
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from backend.etl.supabase_client import supabase
+from backend.etl.supabase_client import supabase, fetch_all_rows
 
 router = APIRouter(prefix="/calendar", tags=["Trial Calendar"])
 
@@ -347,47 +348,38 @@ async def get_calendar_stats():
         raise HTTPException(status_code=500, detail="Database not connected")
 
     try:
-        # Get all trials
-        trials = supabase.table("ci_trial_calendar").select(
-            "phase, status, primary_completion_date, primary_completion_type"
-        ).execute().data
+        # Get all trials (paged past the PostgREST row cap)
+        trials = fetch_all_rows(lambda: supabase.table("ci_trial_calendar").select(
+            "id, phase, status, primary_completion_date, primary_completion_type"
+        ))
 
         total = len(trials)
 
-        # Count by phase
-        phases = {}
-        for t in trials:
-            p = t.get("phase") or "Unknown"
-            phases[p] = phases.get(p, 0) + 1
-
-        # Count by status
-        statuses = {}
-        for t in trials:
-            s = t.get("status") or "Unknown"
-            statuses[s] = statuses.get(s, 0) + 1
+        # Count by phase / status
+        phases = dict(Counter(t.get("phase") or "Unknown" for t in trials))
+        statuses = dict(Counter(t.get("status") or "Unknown" for t in trials))
 
         # Count by date confidence
-        confidences = {"confirmed": 0, "estimated": 0, "placeholder": 0, "unknown": 0}
-        for t in trials:
-            conf = compute_date_confidence(
-                t.get("primary_completion_date"),
-                t.get("primary_completion_type")
-            )
-            confidences[conf] = confidences.get(conf, 0) + 1
+        confidences = Counter({"confirmed": 0, "estimated": 0, "placeholder": 0, "unknown": 0})
+        confidences.update(
+            compute_date_confidence(t.get("primary_completion_date"), t.get("primary_completion_type"))
+            for t in trials
+        )
+        confidences = dict(confidences)
 
-        # Count upcoming
-        today = datetime.now().strftime("%Y-%m-%d")
-        day30 = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-        day90 = (datetime.now() + timedelta(days=90)).strftime("%Y-%m-%d")
+        # Count upcoming (ISO date strings compare chronologically)
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        day30 = (now + timedelta(days=30)).strftime("%Y-%m-%d")
+        day90 = (now + timedelta(days=90)).strftime("%Y-%m-%d")
 
-        upcoming_30 = sum(
-            1 for t in trials
-            if t.get("primary_completion_date") and today <= str(t["primary_completion_date"]) <= day30
-        )
-        upcoming_90 = sum(
-            1 for t in trials
-            if t.get("primary_completion_date") and today <= str(t["primary_completion_date"]) <= day90
-        )
+        upcoming_30 = upcoming_90 = 0
+        for t in trials:
+            date_str = t.get("primary_completion_date")
+            if date_str and today <= str(date_str) <= day90:
+                upcoming_90 += 1
+                if str(date_str) <= day30:
+                    upcoming_30 += 1
 
         return CalendarStats(
             total_trials=total,
@@ -1,10 +1,11 @@
 """
 Epigenetics Oncology Intelligence API Endpoints
 """
+from collections import Counter
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 from pydantic import BaseModel
-from backend.etl.supabase_client import supabase
+from backend.etl.supabase_client import supabase, fetch_all_rows
 
 router = APIRouter(prefix="/epi", tags=["Epigenetics"])
 
@@ -568,25 +569,24 @@ async def get_stats():
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not connected")
 
-    target_count = len(supabase.table("epi_targets").select("id").execute().data)
-    drug_count = len(supabase.table("epi_drugs").select("id").execute().data)
-    indication_count = len(supabase.table("epi_indications").select("id").execute().data)
-
-    approved_drugs = len(supabase.table("epi_drugs")\
-        .select("id")\
-        .eq("fda_approved", True).execute().data)
+    # Counts and the family breakdown come from the same rows, so each table
+    # is read once; count-only tables ask PostgREST for the total inline
+    targets = fetch_all_rows(lambda: supabase.table("epi_targets").select("id, family"))
+    drugs = fetch_all_rows(lambda: supabase.table("epi_drugs").select("id, fda_approved"))
+    target_count = len(targets)
+    drug_count = len(drugs)
+    approved_drugs = sum(1 for d in drugs if d["fda_approved"])
+    indication_count = supabase.table("epi_indications")\
+        .select("id", count="exact").limit(1).execute().count or 0
 
     # Get families distribution
-    targets = supabase.table("epi_targets").select("family").execute().data
-    families = {}
-    for t in targets:
-        fam = t["family"]
-        families[fam] = families.get(fam, 0) + 1
+    families = dict(Counter(t["family"] for t in targets))
 
     # Get editing asset count (if table exists)
     editing_count = 0
     try:
-        editing_count = len(supabase.table("epi_editing_assets").select("id").execute().data)
+        editing_count = supabase.table("epi_editing_assets")\
+            .select("id", count="exact").limit(1).execute().count or 0
     except:
         pass
 
@@ -1400,15 +1400,12 @@ async def get_combo_labels():
     try:
         combos = supabase.table("epi_combos").select("combo_label").execute().data
 
-        label_counts = {}
-        for c in combos:
-            label = c["combo_label"]
-            label_counts[label] = label_counts.get(label, 0) + 1
+        label_counts = Counter(c["combo_label"] for c in combos)
 
         return {
             "labels": [
                 {"label": label, "count": count}
-                for label, count in sorted(label_counts.items(), key=lambda x: -x[1])
+                for label, count in label_counts.most_common()
             ]
         }
 
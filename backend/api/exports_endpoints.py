@@ -11,7 +11,8 @@ from typing import Optional, List, Literal
 from datetime import datetime
 import os
 import io
-from supabase import create_client, Client
+from supabase import Client
+from backend.etl.supabase_client import get_client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/exports", tags=["exports"])
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Client = get_client(SUPABASE_URL, SUPABASE_KEY)
 
 
 # ============================================
@@ -189,27 +190,20 @@ async def export_to_excel(
     header_fill = PatternFill(start_color="1a1a1a", end_color="1a1a1a", fill_type="solid")
     header_alignment = Alignment(horizontal="center", vertical="center")
 
-    # Add data
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            if r_idx == 1:  # Header row
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
+    # Add data (whole rows at a time; only the header needs per-cell styling)
+    for row in dataframe_to_rows(df, index=False, header=True):
+        ws.append(row)
+    for cell in ws[1]:
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+
+    # Auto-adjust column widths from the DataFrame's string lengths
+    # (measured per value: astype(str) keeps nulls as NaN on pandas 3)
+    value_lengths = df.apply(lambda col: col.map(lambda v: len(str(v))).max())
+    for cell, column in zip(ws[1], df.columns):
+        max_length = max(len(str(column)), int(value_lengths[column]))
+        ws.column_dimensions[cell.column_letter].width = min(max_length + 2, 50)
 
     # Save to bytes
     output = io.BytesIO()
@@ -268,17 +262,13 @@ async def export_to_csv(
     if df.empty:
         raise HTTPException(status_code=404, detail="No data found for export")
 
-    # Convert to CSV
-    output = io.StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-
     # Increment export count
     await increment_export_count(user_id)
 
+    # Stream the CSV a slice at a time instead of building the whole file in memory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode()),
+        _iter_csv_chunks(df),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename={filename}_{timestamp}.csv"
@@ -1108,6 +1098,34 @@ async def fetch_pipeline_comparison(drug_ids: List[str], include_scores: bool, i
 # Data Fetching Helpers
 # ============================================
 
+CSV_CHUNK_ROWS = 5000
+
+def _iter_csv_chunks(df, rows_per_chunk: int = CSV_CHUNK_ROWS):
+    """Yield the frame as UTF-8 CSV a slice at a time (header on the first)."""
+    for start in range(0, len(df), rows_per_chunk):
+        chunk = df.iloc[start:start + rows_per_chunk]
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def _optimize_dtypes(df):
+    """
+    Shrink export frames: downcast integer columns and store repetitive
+    string columns (phase, status, drug_type, ...) as categoricals.
+    Floats are left alone so exported scores keep full precision.
+    """
+    import pandas as pd
+
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            values = series.dropna()
+            if len(values) and values.map(type).eq(str).all() and values.nunique() <= len(series) // 2:
+                df[column] = series.astype("category")
+    return df
+
+
 async def fetch_drugs_data(entity_ids: Optional[List[str]], include_scores: bool):
     """Fetch drugs data for export."""
     import pandas as pd
@@ -1141,7 +1159,7 @@ async def fetch_drugs_data(entity_ids: Optional[List[str]], include_scores: bool
             drug["chem_score"] = score.get("chem_score")
             drug["tractability_score"] = score.get("tractability_score")
 
-    return pd.DataFrame(drugs)
+    return _optimize_dtypes(pd.DataFrame(drugs))
 
 
 async def fetch_targets_data(entity_ids: Optional[List[str]]):
@@ -1156,7 +1174,7 @@ async def fetch_targets_data(entity_ids: Optional[List[str]]):
         query = query.in_("id", entity_ids)
 
     result = query.order("symbol").execute()
-    return pd.DataFrame(result.data or [])
+    return _optimize_dtypes(pd.DataFrame(result.data or []))
 
 
 async def fetch_trials_data(entity_ids: Optional[List[str]]):
@@ -1171,7 +1189,7 @@ async def fetch_trials_data(entity_ids: Optional[List[str]]):
         query = query.in_("nct_id", entity_ids)
 
     result = query.order("primary_completion_date").execute()
-    return pd.DataFrame(result.data or [])
+    return _optimize_dtypes(pd.DataFrame(result.data or []))
 
 
 async def fetch_scores_data(entity_ids: Optional[List[str]]):
@@ -1199,7 +1217,7 @@ async def fetch_scores_data(entity_ids: Optional[List[str]]):
             "tractability_score": s.get("tractability_score"),
         })
 
-    return pd.DataFrame(scores)
+    return _optimize_dtypes(pd.DataFrame(scores))
 
 
 async def fetch_watchlist_data(user_id: str):
@@ -1210,4 +1228,4 @@ async def fetch_watchlist_data(user_id: str):
         "entity_type, entity_name, notes, created_at"
     ).eq("user_id", user_id).execute()
 
-    return pd.DataFrame(result.data or [])
+    return _optimize_dtypes(pd.DataFrame(result.data or []))
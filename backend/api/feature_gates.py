@@ -86,30 +86,34 @@ USAGE_LIMITS = {
     },
 }
 
-# Data visibility rules (what fields to hide/blur for free users)
+# Data visibility rules (what fields to hide/blur for free users).
+# Restricted tiers map to frozensets so filter_entity can test keys directly.
 DATA_VISIBILITY = {
     "drug_fields": {
-        SubscriptionTier.FREE: ["id", "name", "chembl_id", "drug_type", "fda_approved"],
+        SubscriptionTier.FREE: frozenset({"id", "name", "chembl_id", "drug_type", "fda_approved"}),
         SubscriptionTier.PRO: "*",  # All fields
         SubscriptionTier.ENTERPRISE: "*",
     },
     "target_fields": {
-        SubscriptionTier.FREE: ["id", "symbol", "name", "family", "target_class"],
+        SubscriptionTier.FREE: frozenset({"id", "symbol", "name", "family", "target_class"}),
         SubscriptionTier.PRO: "*",
         SubscriptionTier.ENTERPRISE: "*",
     },
     "company_fields": {
-        SubscriptionTier.FREE: ["id", "name", "ticker"],
+        SubscriptionTier.FREE: frozenset({"id", "name", "ticker"}),
         SubscriptionTier.PRO: "*",
         SubscriptionTier.ENTERPRISE: "*",
     },
     "news_fields": {
-        SubscriptionTier.FREE: ["id", "title", "source", "pub_date"],  # Headlines only
+        SubscriptionTier.FREE: frozenset({"id", "title", "source", "pub_date"}),  # Headlines only
         SubscriptionTier.PRO: "*",
         SubscriptionTier.ENTERPRISE: "*",
     },
 }
 
+# Fields a hidden tier still sees as present but locked (value nulled)
+LOCKED_FIELDS = frozenset({"bio_score", "chem_score", "tractability_score", "total_score", "max_phase"})
+
 
 # ============================================
 # Feature Access Checker
@@ -263,7 +267,8 @@ class FeatureGateChecker:
         if entity_type not in DATA_VISIBILITY:
             return ["*"]
 
-        return DATA_VISIBILITY[entity_type].get(self.tier, ["*"])
+        visible = DATA_VISIBILITY[entity_type].get(self.tier, "*")
+        return ["*"] if visible == "*" else sorted(visible)
 
     def filter_entity(self, entity: dict, entity_type: str) -> dict:
         """
@@ -276,9 +281,9 @@ class FeatureGateChecker:
         Returns:
             Filtered entity dict
         """
-        visible_fields = self.get_visible_fields(entity_type)
+        visible_fields = DATA_VISIBILITY.get(entity_type, {}).get(self.tier, "*")
 
-        if visible_fields == "*" or "*" in visible_fields:
+        if visible_fields == "*":
             return entity
 
         # For fields that should be hidden, set to None or a placeholder
@@ -286,7 +291,7 @@ class FeatureGateChecker:
         for key, value in entity.items():
             if key in visible_fields:
                 filtered[key] = value
-            elif key in ["bio_score", "chem_score", "tractability_score", "total_score", "max_phase"]:
+            elif key in LOCKED_FIELDS:
                 # Scores and phase - indicate they're locked
                 filtered[key] = None
                 filtered[f"{key}_locked"] = True
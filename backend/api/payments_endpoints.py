@@ -9,7 +9,8 @@ from typing import Optional
 from datetime import datetime
 import os
 import stripe
-from supabase import create_client, Client
+from supabase import Client
+from backend.etl.supabase_client import get_client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,7 +20,7 @@ router = APIRouter(prefix="/payments", tags=["payments"])
 # Supabase setup
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Client = get_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Stripe setup
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
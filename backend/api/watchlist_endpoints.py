@@ -8,7 +8,8 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 import os
-from supabase import create_client, Client
+from supabase import Client
+from backend.etl.supabase_client import get_client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,7 +18,7 @@ router = APIRouter(prefix="/watchlist", tags=["watchlist"])
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Client = get_client(SUPABASE_URL, SUPABASE_KEY)
 
 
 # ============================================
@@ -1,10 +1,22 @@
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 from backend.etl import chembl, supabase_client
 
 # Ensure we can import backend modules
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
+# Cached activity pages make the per-drug work JSON decoding and pXC50 math,
+# which the GIL would serialise across threads, so workers are processes.
+# Each has its own ChEMBL session; DB writes stay in the main process.
+MAX_WORKERS = 8
+
+# Drugs handed to a worker per task (amortises pickling of the results)
+DRUGS_PER_TASK = 16
+
+def fetch_global_activity(chembl_id):
+    return chembl.fetch_chembl_activity(chembl_id, None)
+
 def run():
     print("⚗️ Computing ChEMBL Metrics...")
     
@@ -16,29 +28,40 @@ def run():
     drugs = supabase_client.supabase.table("epi_drugs").select("id, name, chembl_id").execute().data
     print(f"Found {len(drugs)} drugs to process.")
 
+    valid = []
     for drug in drugs:
-        drug_id = drug["id"]
-        name = drug["name"]
         chembl_id = drug.get("chembl_id")
-
         if not chembl_id or not chembl_id.startswith("CHEMBL"):
-            print(f"Skipping {name} (Invalid ChEMBL ID: {chembl_id})")
+            print(f"Skipping {drug['name']} (Invalid ChEMBL ID: {chembl_id})")
             continue
-            
-        print(f"Fetching ChEMBL data for {name} ({chembl_id})...")
-        
-        # Fetch metrics
-        # We pass None for target_chembl_id for now to get general promiscuity/activity
-        # Or should we fetch specific target activity? 
-        # The spec says: "Compute for each drug–primary target pair: p_act_best, delta_p..."
-        # But we haven't linked ChEMBL target IDs to our targets yet.
-        # For v1, let's compute general drug properties (best potency across ALL targets, selectivity).
-        # If we want target-specific, we need to map our targets to ChEMBL target IDs.
-        # Open Targets `target` object has `id` (Ensembl). We can get ChEMBL target ID from OT or UniProt.
-        # For now, let's stick to the "Global" chemistry score for the drug as implemented in the previous iteration.
-        
-        metrics = chembl.fetch_chembl_activity(chembl_id, None)
-        
+        valid.append(drug)
+
+    print(f"Fetching ChEMBL data for {len(valid)} drugs ({MAX_WORKERS} workers)...")
+
+    # Fetch metrics
+    # We pass None for target_chembl_id for now to get general promiscuity/activity
+    # Or should we fetch specific target activity? 
+    # The spec says: "Compute for each drug–primary target pair: p_act_best, delta_p..."
+    # But we haven't linked ChEMBL target IDs to our targets yet.
+    # For v1, let's compute general drug properties (best potency across ALL targets, selectivity).
+    # If we want target-specific, we need to map our targets to ChEMBL target IDs.
+    # Open Targets `target` object has `id` (Ensembl). We can get ChEMBL target ID from OT or UniProt.
+    # For now, let's stick to the "Global" chemistry score for the drug as implemented in the previous iteration.
+    with ProcessPoolExecutor(
+        max_workers=MAX_WORKERS,
+        initializer=chembl.configure_worker,
+        initargs=(chembl.CHEMBL_MAX_RPS / MAX_WORKERS,),
+    ) as executor:
+        all_metrics = list(executor.map(
+            fetch_global_activity, [d["chembl_id"] for d in valid], chunksize=DRUGS_PER_TASK
+        ))
+
+    # Rows are written in bulk once every drug is scored
+    metrics_rows = []
+    for drug, metrics in zip(valid, all_metrics):
+        drug_id = drug["id"]
+        name = drug["name"]
+
         if not metrics:
             print(f"  ⚠️ No metrics found for {name}")
             continue
@@ -88,8 +111,11 @@ def run():
             "chem_score": chem_score
         }
         
-        supabase_client.upsert_chembl_metrics(metrics_data)
-        print(f"  ✅ Saved metrics for {name} (Score: {chem_score}, pBest: {metrics.get('p_act_best'):.2f})" if metrics.get('p_act_best') else f"  ✅ Saved metrics for {name} (Score: {chem_score})")
+        metrics_rows.append(metrics_data)
+        print(f"  ✅ Scored {name} (Score: {chem_score}, pBest: {metrics.get('p_act_best'):.2f})" if metrics.get('p_act_best') else f"  ✅ Scored {name} (Score: {chem_score})")
+
+    saved = supabase_client.upsert_chembl_metrics(metrics_rows)
+    print(f"✅ Saved metrics for {saved} drugs.")
 
 if __name__ == "__main__":
     run()
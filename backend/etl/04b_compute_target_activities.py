@@ -8,15 +8,19 @@ This provides detailed potency data per target, enabling:
 - Richer chemistry insights than aggregate metrics alone
 
 Usage:
-    python -m backend.etl.04b_compute_target_activities
+    python -m backend.etl.04b_compute_target_activities [--no-cache | --cache-first]
 """
 
+import argparse
 import math
 import statistics
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from backend.etl import chembl
 from backend.etl.supabase_client import supabase
 
-CHEMBL_API_URL = "https://www.ebi.ac.uk/chembl/api/data"
+# ChEMBL fetches are pure I/O; overlap them with a bounded worker pool
+# (chembl's shared session, rate limiter and disk cache serve all workers)
+MAX_WORKERS = 8
 
 
 def fetch_target_activities(chembl_molecule_id: str) -> list:
@@ -24,20 +28,8 @@ def fetch_target_activities(chembl_molecule_id: str) -> list:
     Fetch per-target activity breakdown from ChEMBL.
     Returns list of dicts with target-level metrics.
     """
-    url = f"{CHEMBL_API_URL}/activity"
-    params = {
-        "molecule_chembl_id": chembl_molecule_id,
-        "standard_type__in": "Ki,Kd,IC50,EC50",
-        "standard_units": "nM",
-        "limit": 500,
-        "format": "json"
-    }
-
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        activities = data.get("activities", [])
+        activities = chembl.fetch_activities(chembl_molecule_id, limit=500)
     except Exception as e:
         print(f"  ❌ Error fetching ChEMBL: {e}")
         return []
@@ -47,7 +39,7 @@ def fetch_target_activities(chembl_molecule_id: str) -> list:
 
     for act in activities:
         # Quality filter: Binding or Functional assays only
-        if act.get("assay_type") not in ["B", "F"]:
+        if act.get("assay_type") not in chembl.QUALITY_ASSAY_TYPES:
             continue
 
         target_chembl = act.get("target_chembl_id", "")
@@ -67,49 +59,46 @@ def fetch_target_activities(chembl_molecule_id: str) -> list:
         except:
             continue
 
-        if target_chembl not in targets:
+        # Best potency is tracked as we go; only the median needs every pXC50
+        data = targets.get(target_chembl)
+        if data is None:
             targets[target_chembl] = {
-                "target_chembl_id": target_chembl,
                 "target_name": target_name,
                 "target_type": target_type,
-                "pvals": [],
-                "values_nm": [],
-                "activity_types": set()
+                "pvals": [p_val],
+                "best_pact": p_val,
+                "best_value_nm": val_nm,  # Lower nM = more potent
+                "activity_types": {std_type}
             }
+            continue
 
-        targets[target_chembl]["pvals"].append(p_val)
-        targets[target_chembl]["values_nm"].append(val_nm)
-        targets[target_chembl]["activity_types"].add(std_type)
+        data["pvals"].append(p_val)
+        if p_val > data["best_pact"]:
+            data["best_pact"] = p_val
+        if val_nm < data["best_value_nm"]:
+            data["best_value_nm"] = val_nm
+        data["activity_types"].add(std_type)
 
     # Convert to list with computed metrics
-    results = []
-    for target_id, data in targets.items():
-        pvals = data["pvals"]
-        values = data["values_nm"]
-
-        results.append({
-            "target_chembl_id": target_id,
-            "target_name": data["target_name"],
-            "target_type": data["target_type"],
-            "best_pact": max(pvals) if pvals else None,
-            "median_pact": statistics.median(pvals) if pvals else None,
-            "best_value_nm": min(values) if values else None,  # Lower nM = more potent
-            "n_activities": len(pvals),
-            "activity_types": list(data["activity_types"])
-        })
+    results = [{
+        "target_chembl_id": target_id,
+        "target_name": data["target_name"],
+        "target_type": data["target_type"],
+        "best_pact": data["best_pact"],
+        "median_pact": statistics.median(data["pvals"]),
+        "best_value_nm": data["best_value_nm"],
+        "n_activities": len(data["pvals"]),
+        "activity_types": list(data["activity_types"])
+    } for target_id, data in targets.items()]
 
     # Sort by best potency (highest first)
     results.sort(key=lambda x: x["best_pact"] or 0, reverse=True)
     return results
 
 
-def upsert_target_activity(drug_id: str, data: dict):
-    """Insert or update target activity record."""
-    existing = supabase.table("chembl_target_activities").select("id")\
-        .eq("drug_id", drug_id)\
-        .eq("target_chembl_id", data["target_chembl_id"]).execute()
-
-    record = {
+def upsert_target_activities(drug_id: str, activities: list):
+    """Insert or update all target activity records for a drug in one request."""
+    records = [{
         "drug_id": drug_id,
         "target_chembl_id": data["target_chembl_id"],
         "target_name": data["target_name"],
@@ -119,13 +108,11 @@ def upsert_target_activity(drug_id: str, data: dict):
         "best_value_nm": data["best_value_nm"],
         "n_activities": data["n_activities"],
         "activity_types": data["activity_types"],
-    }
+    } for data in activities]
 
-    if existing.data:
-        supabase.table("chembl_target_activities").update(record)\
-            .eq("id", existing.data[0]["id"]).execute()
-    else:
-        supabase.table("chembl_target_activities").insert(record).execute()
+    # UNIQUE(drug_id, target_chembl_id) makes this a single upsert
+    supabase.table("chembl_target_activities")\
+        .upsert(records, on_conflict="drug_id,target_chembl_id").execute()
 
 
 def run():
@@ -142,35 +129,33 @@ def run():
     print(f"Found {len(drugs)} drugs\n")
 
     processed = 0
-    skipped = 0
 
-    for drug in drugs:
-        drug_id = drug["id"]
-        name = drug["name"]
-        chembl_id = drug.get("chembl_id")
+    valid = [d for d in drugs if d.get("chembl_id") and d["chembl_id"].startswith("CHEMBL")]
+    skipped = len(drugs) - len(valid)
 
-        if not chembl_id or not chembl_id.startswith("CHEMBL"):
-            skipped += 1
-            continue
+    # Fetch all drugs' activities concurrently; results come back in input order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        all_activities = executor.map(fetch_target_activities, [d["chembl_id"] for d in valid])
 
-        print(f"Processing {name} ({chembl_id})...")
+        for drug, activities in zip(valid, all_activities):
+            drug_id = drug["id"]
+            name = drug["name"]
+            chembl_id = drug["chembl_id"]
 
-        # Fetch target activities
-        activities = fetch_target_activities(chembl_id)
+            print(f"Processing {name} ({chembl_id})...")
 
-        if not activities:
-            print(f"  ⚠️ No target activities found")
-            continue
+            if not activities:
+                print(f"  ⚠️ No target activities found")
+                continue
 
-        # Store each target's data
-        for act in activities:
-            upsert_target_activity(drug_id, act)
+            # Store all targets' data in one write
+            upsert_target_activities(drug_id, activities)
 
-        # Print summary
-        top = activities[0] if activities else {}
-        print(f"  ✅ {len(activities)} targets | Best: {top.get('target_name', 'N/A')[:30]}... "
-              f"pXC50={top.get('best_pact', 0):.2f}")
-        processed += 1
+            # Print summary
+            top = activities[0] if activities else {}
+            print(f"  ✅ {len(activities)} targets | Best: {top.get('target_name', 'N/A')[:30]}... "
+                  f"pXC50={top.get('best_pact', 0):.2f}")
+            processed += 1
 
     print(f"\n{'=' * 60}")
     print(f"Processed: {processed} drugs")
@@ -179,4 +164,14 @@ def run():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute per-target activities from ChEMBL")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk ChEMBL cache")
+    parser.add_argument("--cache-first", action="store_true", help="Use cached pages of any age; only fetch misses")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        chembl.set_cache_enabled(False)
+    elif args.cache_first:
+        chembl.set_cache_first(True)
+
     run()
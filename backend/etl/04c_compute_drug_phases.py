@@ -13,24 +13,28 @@ Phase values from ChEMBL:
 - 3 = Phase 3
 - 4 = Approved
 
+Molecule records are cached on disk by backend.etl.chembl; pass --no-cache
+to force a refetch, or --cache-first to reuse cached records of any age and
+only query ChEMBL for drugs not yet cached.
+
 IMPORTANT: Before running, ensure the max_phase column exists:
   ALTER TABLE epi_drugs ADD COLUMN IF NOT EXISTS max_phase INTEGER;
 """
 
-import requests
-import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from backend.etl import chembl
 from backend.etl.supabase_client import supabase
 
-CHEMBL_BASE = "https://www.ebi.ac.uk/chembl/api/data"
+# Molecule lookups share chembl's pooled session and rate limiter
+MAX_WORKERS = 8
 
 
 def fetch_chembl_phase(chembl_id: str) -> int | None:
     """Fetch max_phase from ChEMBL API for a given molecule."""
     try:
-        url = f"{CHEMBL_BASE}/molecule/{chembl_id}.json"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
+        data = chembl.fetch_molecule(chembl_id)
+        if data:
             max_phase = data.get("max_phase")
             if max_phase is not None:
                 # ChEMBL returns floats like 3.0, convert to int
@@ -54,17 +58,20 @@ def main():
     skipped = 0
     errors = 0
 
+    with_ids = []
     for drug in drugs:
-        chembl_id = drug.get("chembl_id")
-        name = drug["name"]
-
-        if not chembl_id:
-            print(f"  {name}: No ChEMBL ID, skipping")
+        if not drug.get("chembl_id"):
+            print(f"  {drug['name']}: No ChEMBL ID, skipping")
             skipped += 1
             continue
+        with_ids.append(drug)
+
+    # Fetch phases from ChEMBL concurrently; updates stay serial
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        phases = list(executor.map(fetch_chembl_phase, [d["chembl_id"] for d in with_ids]))
 
-        # Fetch phase from ChEMBL
-        phase = fetch_chembl_phase(chembl_id)
+    for drug, phase in zip(with_ids, phases):
+        name = drug["name"]
 
         if phase is not None:
             # If FDA approved in our data but ChEMBL shows lower phase, use 4
@@ -93,9 +100,6 @@ def main():
                 print(f"  {name}: No phase data in ChEMBL")
                 skipped += 1
 
-        # Rate limit to avoid hitting ChEMBL too hard
-        time.sleep(0.2)
-
     print(f"\n=== Summary ===")
     print(f"Updated: {updated}")
     print(f"Skipped: {skipped}")
@@ -103,4 +107,14 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch drug max_phase from ChEMBL")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk ChEMBL cache")
+    parser.add_argument("--cache-first", action="store_true", help="Use cached records of any age; only fetch misses")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        chembl.set_cache_enabled(False)
+    elif args.cache_first:
+        chembl.set_cache_first(True)
+
     main()
@@ -21,33 +21,36 @@ def run():
     disease_score_cache = {}
     # target_id -> tractability_score
     tractability_cache = {}
+    # drug_id -> target rows (a drug's targets are looked up once per run)
+    drug_targets_cache = {}
     
     for pair in pairs:
         drug_id = pair["drug_id"]
         indication_id = pair["indication_id"]
         
-        # Get Indication EFO ID
-        indication = supabase_client.supabase.table("epi_indications").select("efo_id").eq("id", indication_id).single().execute().data
-        efo_id = indication["efo_id"]
+        # Indication EFO ID comes embedded in the pair row
+        efo_id = pair["epi_indications"]["efo_id"]
         
-        # Get Drug Targets
-        targets = supabase_client.get_drug_targets(drug_id)
+        # Drug targets and their OT IDs in one query per drug
+        if drug_id not in drug_targets_cache:
+            drug_targets_cache[drug_id] = supabase_client.get_drug_target_infos(drug_id)
+        target_infos = drug_targets_cache[drug_id]
         
         # --- BioScore ---
         # Max association score of any target for this disease
         bio_score_raw = 0.0
         
-        if efo_id not in disease_score_cache:
-            print(f"Fetching association scores for {efo_id}...")
-            disease_score_cache[efo_id] = open_targets.fetch_disease_targets_scores(efo_id)
-            
-        scores = disease_score_cache[efo_id]
+        # Without a target that has an OT ID there is nothing to look up
+        if not any(t_info["ot_target_id"] for t_info in target_infos):
+            scores = {}
+        else:
+            if efo_id not in disease_score_cache:
+                print(f"Fetching association scores for {efo_id}...")
+                disease_score_cache[efo_id] = open_targets.fetch_disease_targets_scores(efo_id)
+            scores = disease_score_cache[efo_id]
         
-        for t in targets:
+        for t_info in target_infos:
             # We need OT Target ID
-            t_info = supabase_client.get_epi_target(t["target_id"])
-            if not t_info: continue
-            
             ot_tid = t_info["ot_target_id"]
             score = scores.get(ot_tid, 0.0)
             if score > bio_score_raw:
@@ -59,9 +62,7 @@ def run():
         # Max tractability of any target
         tract_score_max = 0
         
-        for t in targets:
-            t_info = supabase_client.get_epi_target(t["target_id"])
-            if not t_info: continue
+        for t_info in target_infos:
             ot_tid = t_info["ot_target_id"]
             
             if ot_tid not in tractability_cache:
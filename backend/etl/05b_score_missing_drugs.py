@@ -43,33 +43,57 @@ def run():
         drug_id = drug["id"]
 
         # Get drug-indication pairs
-        pairs = supabase_client.supabase.table("epi_drug_indications").select("id, indication_id").eq("drug_id", drug_id).execute().data
+        # (with each indication's EFO ID and name embedded)
+        pairs = supabase_client.supabase.table("epi_drug_indications")\
+            .select("id, indication_id, epi_indications(efo_id, name)").eq("drug_id", drug_id).execute().data
 
         if not pairs:
             print(f"  ⚠️ No indications for {drug_name}")
             continue
 
-        # Get drug targets
-        targets = supabase_client.get_drug_targets(drug_id)
-        print(f"  Targets: {len(targets)}")
+        # Get drug targets with their OT IDs in one query; targets and their
+        # tractability are independent of the indication, so reuse them for every pair
+        target_infos = supabase_client.get_drug_target_infos(drug_id)
+        print(f"  Targets: {len(target_infos)}")
+
+        for t_info in target_infos:
+            if not t_info.get("ot_target_id"):
+                print(f"      {t_info['symbol']}: No OT target ID")
+
+        ot_tids = sorted({t["ot_target_id"] for t in target_infos if t.get("ot_target_id")})
+        print(f"    Fetching tractability for {len(ot_tids)} targets...")
+        tract_by_target = open_targets.fetch_tractability_batch(ot_tids)
+
+        tract_scores = {}
+        for ot_tid, tract_data in tract_by_target.items():
+            ts = 0
+            for item in tract_data:
+                if item.get("modality") == "SM" and item.get("value") is True:
+                    label = item.get("label", "")
+                    if label in label_scores:
+                        ts = max(ts, label_scores[label])
+
+            tract_scores[ot_tid] = ts
+            print(f"      {ot_tid} tractability: {ts}")
 
         for pair in pairs:
             indication_id = pair["indication_id"]
 
-            # Get indication EFO ID
-            indication = supabase_client.supabase.table("epi_indications").select("efo_id, name").eq("id", indication_id).single().execute().data
+            indication = pair["epi_indications"]
             efo_id = indication["efo_id"]
             print(f"  Indication: {indication['name']} ({efo_id})")
 
             # --- BioScore ---
-            print(f"    Fetching disease associations for {efo_id}...")
-            disease_scores = open_targets.fetch_disease_targets_scores(efo_id)
+            # Association scores can only matter for targets with an OT ID,
+            # so only those are requested
+            if ot_tids:
+                print(f"    Fetching disease associations for {efo_id}...")
+                disease_scores = open_targets.fetch_disease_target_scores_for(efo_id, ot_tids)
+            else:
+                disease_scores = {}
 
             bio_score_raw = 0.0
-            for t in targets:
-                t_info = supabase_client.get_epi_target(t["target_id"])
-                if not t_info:
-                    continue
+            for t_info in target_infos:
                 ot_tid = t_info.get("ot_target_id")
                 if ot_tid:
                     score = disease_scores.get(ot_tid, 0.0)
@@ -81,29 +105,7 @@ def run():
             print(f"    BioScore: {bio_score:.1f}")
 
             # --- TractabilityScore ---
-            tract_score_max = 0
-            for t in targets:
-                t_info = supabase_client.get_epi_target(t["target_id"])
-                if not t_info:
-                    continue
-                ot_tid = t_info.get("ot_target_id")
-                if not ot_tid:
-                    print(f"      {t_info['symbol']}: No OT target ID")
-                    continue
-
-                print(f"    Fetching tractability for {t_info['symbol']}...")
-                tract_data = open_targets.fetch_tractability(ot_tid)
-
-                ts = 0
-                for item in tract_data:
-                    if item.get("modality") == "SM" and item.get("value") is True:
-                        label = item.get("label", "")
-                        if label in label_scores:
-                            ts = max(ts, label_scores[label])
-
-                if ts > tract_score_max:
-                    tract_score_max = ts
-                print(f"      Tractability: {ts}")
+            tract_score_max = max(tract_scores.values(), default=0)
 
             print(f"    TractabilityScore: {tract_score_max}")
 
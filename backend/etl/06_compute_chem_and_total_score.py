@@ -5,6 +5,28 @@ from backend.etl import supabase_client
 # Ensure we can import backend modules
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
+# Weights
+W_BIO = 0.5
+W_CHEM = 0.3
+W_TRACT = 0.2
+
+def compute_total_score(bio_score: float, chem_score: float, tract_score: float) -> float:
+    """Weighted TotalScore with the biology / tractability floor caps, clamped to 0-100."""
+    # Renormalize if missing data (simplified)
+    # If chem_score is 0 (missing), distribute weight?
+    # For now, let's keep it simple as per spec:
+    # "Apply caps (biology floor, tractability floor)"
+    total_raw = (W_BIO * bio_score) + (W_CHEM * chem_score) + (W_TRACT * tract_score)
+
+    # Floors
+    if bio_score == 0:
+        total_raw = min(total_raw, 30)
+
+    if tract_score <= 20:
+        total_raw = min(total_raw, 50)
+
+    return max(0, min(100, total_raw))
+
 def run():
     print("⚗️ Computing ChemScore & TotalScore...")
     
@@ -13,52 +35,39 @@ def run():
         return
 
     # 1. Fetch all scores (Bio & Tractability computed)
-    scores = supabase_client.supabase.table("epi_scores").select("*").execute().data
+    scores = supabase_client.fetch_all_rows(
+        lambda: supabase_client.supabase.table("epi_scores")
+            .select("id, drug_id, indication_id, bio_score, tractability_score")
+    )
     print(f"Found {len(scores)} score records.")
-    
+
+    # 2. ChemScore for every drug in one paged select instead of one query per record.
+    # Assuming one chembl_metrics row per drug; the first one seen wins.
+    chem_by_drug = {}
+    for m in supabase_client.iter_rows(
+        lambda: supabase_client.supabase.table("chembl_metrics").select("id, drug_id, chem_score")
+    ):
+        chem_by_drug.setdefault(m["drug_id"], m.get("chem_score") or 0)
+
+    # 3. Score every record in one pass, then write in bulk
+    updates = []
     for record in scores:
-        drug_id = record["drug_id"]
-        
-        # Fetch ChemMetrics for Drug
-        # We need to join or fetch separately.
-        metrics = supabase_client.supabase.table("chembl_metrics").select("chem_score").eq("drug_id", drug_id).execute().data
-        
-        chem_score = 0
-        if metrics:
-            # Use the most recent or max? Assuming one per drug for now.
-            chem_score = metrics[0].get("chem_score", 0) or 0
-            
+        chem_score = chem_by_drug.get(record["drug_id"], 0)
         bio_score = record.get("bio_score") or 0
         tract_score = record.get("tractability_score") or 0
-        
-        # Weights
-        w_bio = 0.5
-        w_chem = 0.3
-        w_tract = 0.2
-        
-        # Renormalize if missing data (simplified)
-        # If chem_score is 0 (missing), distribute weight?
-        # For now, let's keep it simple as per spec:
-        # "Apply caps (biology floor, tractability floor)"
-        
-        total_raw = (w_bio * bio_score) + (w_chem * chem_score) + (w_tract * tract_score)
-        
-        # Floors
-        if bio_score == 0:
-            total_raw = min(total_raw, 30)
-            
-        if tract_score <= 20:
-            total_raw = min(total_raw, 50)
-            
-        total_score = max(0, min(100, total_raw))
-        
-        # Update
-        supabase_client.supabase.table("epi_scores").update({
+        total_score = compute_total_score(bio_score, chem_score, tract_score)
+
+        updates.append({
+            "id": record["id"],
+            "drug_id": record["drug_id"],
+            "indication_id": record["indication_id"],
             "chem_score": chem_score,
             "total_score": total_score
-        }).eq("id", record["id"]).execute()
-        
-        print(f"  ✅ Updated TotalScore for {record['id']}: {total_score:.1f}")
+        })
+        print(f"  ✅ TotalScore for {record['id']}: {total_score:.1f}")
+
+    written = supabase_client.update_epi_scores(updates)
+    print(f"Updated {written} score records.")
 
 if __name__ == "__main__":
     run()
@@ -5,6 +5,21 @@ from backend.etl import supabase_client
 # Ensure we can import backend modules
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
+# DREAM complex components: (symbol, role)
+DREAM_COMPONENTS: tuple[tuple[str, str], ...] = (
+    ("RBL1", "core_subunit"),
+    ("RBL2", "core_subunit"),
+    ("E2F4", "core_subunit"),
+    ("E2F5", "core_subunit"),
+    ("TFDP1", "core_subunit"),
+    ("TFDP2", "core_subunit"),
+    ("LIN9", "core_subunit"),
+    ("LIN37", "core_subunit"),
+    ("LIN52", "core_subunit"),
+    ("LIN54", "core_subunit"),
+    ("RBBP4", "core_subunit"),
+)
+
 def run():
     print("🎼 Seeding Signatures (DREAM Complex)...")
     
@@ -22,22 +37,7 @@ def run():
     print(f"Created/Updated DREAM Complex (ID: {sig_id})")
     
     # 2. Add Targets
-    # Map of Symbol -> Role
-    components = {
-        "RBL1": "core_subunit",
-        "RBL2": "core_subunit",
-        "E2F4": "core_subunit",
-        "E2F5": "core_subunit",
-        "TFDP1": "core_subunit",
-        "TFDP2": "core_subunit",
-        "LIN9": "core_subunit",
-        "LIN37": "core_subunit",
-        "LIN52": "core_subunit",
-        "LIN54": "core_subunit",
-        "RBBP4": "core_subunit"
-    }
-    
-    for symbol, role in components.items():
+    for symbol, role in DREAM_COMPONENTS:
         # Find Target ID
         target = supabase_client.supabase.table("epi_targets").select("id").eq("symbol", symbol).execute().data
         
@@ -13,15 +13,19 @@ Usage:
 """
 
 import argparse
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
-from backend.etl.supabase_client import supabase
+from backend.etl.supabase_client import supabase, upsert_drug_candidates
 from backend.etl.open_targets import fetch_known_drugs_for_target
 
 # Drug types we want (case-insensitive)
 SMALL_MOLECULE_TYPES = {"small molecule", "small_molecule", "smallmolecule"}
 ANTIBODY_TYPES = {"antibody", "antibody drug conjugate"}
 
+# Open Targets fetches run in a bounded pool; upserts stay on the main thread
+# and overlap with the fetches still in flight
+MAX_WORKERS = 4
+
 
 def get_all_targets():
     """Fetch all targets from epi_targets."""
@@ -104,24 +108,15 @@ def fetch_candidates_for_target(
 
 
 def upsert_candidates(candidates: list):
-    """Insert candidates, skip duplicates."""
+    """Upsert a target's candidates in one request, return the number written."""
     if not candidates:
         return 0
 
-    inserted = 0
-    for c in candidates:
-        try:
-            supabase.table("epi_drug_candidates").upsert(
-                c,
-                on_conflict="ot_drug_id,ot_target_id,indication_efo_id"
-            ).execute()
-            inserted += 1
-        except Exception as e:
-            # Likely duplicate, skip
-            if "duplicate" not in str(e).lower():
-                print(f"    ⚠️  Error inserting {c['name']}: {e}")
-
-    return inserted
+    try:
+        return upsert_drug_candidates(candidates)
+    except Exception as e:
+        print(f"    ⚠️  Error inserting {len(candidates)} candidates: {e}")
+        return 0
 
 
 def main(min_phase: float = 1.0, include_antibodies: bool = False):
@@ -146,32 +141,30 @@ def main(min_phase: float = 1.0, include_antibodies: bool = False):
     total_candidates = 0
     total_inserted = 0
 
-    for i, target in enumerate(targets, 1):
-        target_id = target["id"]
-        symbol = target["symbol"]
-        ot_target_id = target.get("ot_target_id")
-
-        print(f"[{i:2}/{len(targets)}] {symbol}...", end=" ", flush=True)
-
-        candidates = fetch_candidates_for_target(
-            target_id=target_id,
-            target_symbol=symbol,
-            ot_target_id=ot_target_id,
+    def fetch_target(target):
+        return fetch_candidates_for_target(
+            target_id=target["id"],
+            target_symbol=target["symbol"],
+            ot_target_id=target.get("ot_target_id"),
             min_phase=min_phase,
             include_antibodies=include_antibodies,
             existing_gold=existing_gold,
         )
 
-        if candidates:
-            inserted = upsert_candidates(candidates)
-            total_candidates += len(candidates)
-            total_inserted += inserted
-            print(f"found {len(candidates)} candidates, inserted {inserted}")
-        else:
-            print("no candidates")
-
-        # Rate limiting
-        time.sleep(0.2)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # map yields in target order as each fetch completes
+        for i, (target, candidates) in enumerate(
+            zip(targets, executor.map(fetch_target, targets)), 1
+        ):
+            print(f"[{i:2}/{len(targets)}] {target['symbol']}...", end=" ", flush=True)
+
+            if candidates:
+                inserted = upsert_candidates(candidates)
+                total_candidates += len(candidates)
+                total_inserted += inserted
+                print(f"found {len(candidates)} candidates, inserted {inserted}")
+            else:
+                print("no candidates")
 
     print()
     print("=" * 60)
@@ -8,7 +8,7 @@ Usage:
     python -m backend.etl.09_promote_candidates
 """
 
-from backend.etl.supabase_client import supabase
+from backend.etl.supabase_client import supabase, insert_epi_drug_target, fetch_all_rows
 from backend.etl.open_targets import fetch_tractability
 
 # The 7 verified unique drugs to promote
@@ -23,31 +23,44 @@ DRUGS_TO_PROMOTE = [
 ]
 
 
-def get_or_create_indication(efo_id: str, name: str) -> int:
-    """Get existing indication or create new one."""
-    if efo_id:
-        existing = supabase.table("epi_indications").select("id").eq("efo_id", efo_id).execute()
-        if existing.data:
-            return existing.data[0]["id"]
+def load_indication_ids() -> dict:
+    """Map every epi_indication's efo_id and name to its id (one paginated read)."""
+    ids = {}
+    rows = fetch_all_rows(lambda: supabase.table("epi_indications").select("id, efo_id, name"))
+    for row in rows:
+        if row.get("efo_id"):
+            ids[("efo_id", row["efo_id"])] = row["id"]
+        if row.get("name"):
+            ids.setdefault(("name", row["name"]), row["id"])
+    return ids
+
+
+def get_or_create_indication(efo_id: str, name: str, indication_ids: dict) -> int:
+    """Get existing indication or create new one (indication_ids from load_indication_ids)."""
+    if efo_id and ("efo_id", efo_id) in indication_ids:
+        return indication_ids[("efo_id", efo_id)]
 
     # Check by name
-    if name:
-        existing = supabase.table("epi_indications").select("id").eq("name", name).execute()
-        if existing.data:
-            return existing.data[0]["id"]
+    if name and ("name", name) in indication_ids:
+        return indication_ids[("name", name)]
 
     # Create new
     result = supabase.table("epi_indications").insert({
         "name": name,
         "efo_id": efo_id,
     }).execute()
-    return result.data[0]["id"]
+    indication_id = result.data[0]["id"]
+    if efo_id:
+        indication_ids[("efo_id", efo_id)] = indication_id
+    if name:
+        indication_ids[("name", name)] = indication_id
+    return indication_id
 
 
-def get_target_by_symbol(symbol: str):
-    """Get target by symbol."""
-    result = supabase.table("epi_targets").select("id, ot_target_id").eq("symbol", symbol).execute()
-    return result.data[0] if result.data else None
+def load_targets_by_symbol() -> dict:
+    """Map symbol -> {id, ot_target_id} for every epi_target (one paginated read)."""
+    rows = fetch_all_rows(lambda: supabase.table("epi_targets").select("id, symbol, ot_target_id"))
+    return {row["symbol"]: row for row in rows}
 
 
 def compute_tractability_score(ot_target_id: str) -> float:
@@ -111,6 +124,10 @@ def main():
         if c.get("indication_efo_id"):
             drugs_data[name]["indications"][c["indication_efo_id"]] = c.get("indication_name")
 
+    # Targets and indications are looked up for every drug; read them once
+    targets_by_symbol = load_targets_by_symbol()
+    indication_ids = load_indication_ids()
+
     print(f"Found {len(drugs_data)} drugs to promote:")
     for name, data in drugs_data.items():
         print(f"  - {name}: {len(data['targets'])} targets, {len(data['indications'])} indications")
@@ -142,20 +159,17 @@ def main():
 
         # 2. Link to targets
         for target_symbol in data["targets"]:
-            target = get_target_by_symbol(target_symbol)
+            target = targets_by_symbol.get(target_symbol)
             if not target:
                 print(f"  Warning: Target {target_symbol} not found")
                 continue
 
-            # Check if link exists
-            existing_link = supabase.table("epi_drug_targets").select("id").eq("drug_id", drug_id).eq("target_id", target["id"]).execute()
-            if not existing_link.data:
-                supabase.table("epi_drug_targets").insert({
-                    "drug_id": drug_id,
-                    "target_id": target["id"],
-                    "mechanism_of_action": data["target_mechanisms"].get(target_symbol),
-                    "is_primary_target": True,  # All targets from OT are considered primary
-                }).execute()
+            if insert_epi_drug_target({
+                "drug_id": drug_id,
+                "target_id": target["id"],
+                "mechanism_of_action": data["target_mechanisms"].get(target_symbol),
+                "is_primary_target": True,  # All targets from OT are considered primary
+            }):
                 print(f"  Linked to target {target_symbol}")
 
         # 3. Link to indications and create scores
@@ -163,7 +177,7 @@ def main():
             if not ind_name:
                 continue
 
-            indication_id = get_or_create_indication(efo_id, ind_name)
+            indication_id = get_or_create_indication(efo_id, ind_name, indication_ids)
 
             # Check if drug-indication link exists
             existing_di = supabase.table("epi_drug_indications").select("id").eq("drug_id", drug_id).eq("indication_id", indication_id).execute()
@@ -184,7 +198,7 @@ def main():
                 # Tractability score from first target
                 tract_score = 50.0
                 for target_symbol in data["targets"]:
-                    target = get_target_by_symbol(target_symbol)
+                    target = targets_by_symbol.get(target_symbol)
                     if target and target.get("ot_target_id"):
                         tract_score = compute_tractability_score(target["ot_target_id"])
                         break
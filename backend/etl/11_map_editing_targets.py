@@ -83,14 +83,10 @@ def _enrich_target_gene(symbol: str) -> dict:
 
     # Try to find in Open Targets
     try:
-        ot_target = open_targets.search_target_by_symbol(symbol)
+        ot_target = open_targets.search_target_with_uniprot(symbol)
         if ot_target:
             ot_id = ot_target["id"]
-            details = open_targets.fetch_target_details(ot_id)
-
-            uniprot_id = None
-            if details and details.get("proteinAnnotations"):
-                uniprot_id = details["proteinAnnotations"].get("id")
+            uniprot_id = ot_target["uniprot_id"]
 
             # Check if this symbol exists in epi_targets
             epi_target = supabase_client.get_epi_target_by_symbol(symbol)
@@ -121,14 +117,10 @@ def _enrich_and_update_target_gene(symbol: str):
         return
 
     try:
-        ot_target = open_targets.search_target_by_symbol(symbol)
+        ot_target = open_targets.search_target_with_uniprot(symbol)
         if ot_target:
             ot_id = ot_target["id"]
-            details = open_targets.fetch_target_details(ot_id)
-
-            uniprot_id = None
-            if details and details.get("proteinAnnotations"):
-                uniprot_id = details["proteinAnnotations"].get("id")
+            uniprot_id = ot_target["uniprot_id"]
 
             update_data = {
                 "symbol": symbol,
@@ -15,12 +15,16 @@ Run: python -m backend.etl.12_compute_editing_scores
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
 from backend.etl import supabase_client, open_targets
 
 
+# Open Targets bio-score lookups in flight at once
+MAX_WORKERS = 4
+
 # Modality scoring parameters
 DELIVERY_SCORES = {
     "LNP_mRNA": 85,      # High delivery efficiency, proven clinical use
@@ -29,6 +33,12 @@ DELIVERY_SCORES = {
     "other": 50,
 }
 
+# Non-gene targets (viruses, pan-target programs); no Open Targets lookup
+NON_GENE_TARGETS = frozenset({"HBV", "HCV", "HIV", "Various"})
+
+# Transcriptional activator domains (uppercase, compared to uppercased domains)
+ACTIVATOR_DOMAINS = frozenset({"VP64", "VPR", "P65", "RTA"})
+
 DBD_SCORES = {
     "CRISPR_dCas9": 90,  # Most versatile, well-characterized
     "CRISPR_dSaCas9": 85,  # Smaller, good for AAV
@@ -66,12 +76,16 @@ def run():
     assets = supabase_client.get_all_editing_assets()
     print(f"Found {len(assets)} editing assets.\n")
 
-    for asset in assets:
+    # Target biology needs an Open Targets round trip per asset; run them
+    # concurrently up front and score/save serially in the original order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        bio_scores = list(executor.map(_compute_target_bio_score, assets))
+
+    for asset, target_bio_score in zip(assets, bio_scores):
         name = asset["name"]
         print(f"Scoring: {name}")
 
         # 1. Target Biology Score
-        target_bio_score = _compute_target_bio_score(asset)
         print(f"  Target Bio Score: {target_bio_score:.1f}")
 
         # 2. Editing Modality Score
@@ -126,20 +140,18 @@ def _compute_target_bio_score(asset: dict) -> float:
         return 30.0  # Baseline for unknown targets
 
     # Skip non-gene targets (viruses, etc.)
-    if target_symbol in ["HBV", "HCV", "HIV", "Various"]:
+    if target_symbol in NON_GENE_TARGETS:
         # For viral targets, assume high biological validity
         return 75.0
 
     # Try to get Open Targets association score
     try:
-        ot_target = open_targets.search_target_by_symbol(target_symbol)
+        # Target search and its disease associations in one GraphQL call
+        ot_target = open_targets.search_target_with_disease_associations(target_symbol)
         if not ot_target:
             return 40.0
 
-        ot_id = ot_target["id"]
-
-        # Fetch disease associations
-        associations = open_targets.fetch_target_disease_associations(ot_id)
+        associations = ot_target["associations"]
         if not associations:
             return 45.0
 
@@ -209,11 +221,14 @@ def _compute_durability_score(asset: dict) -> float:
     effector_type = asset.get("effector_type", "other")
     effector_domains = asset.get("effector_domains", []) or []
 
+    # Uppercase each domain once for all the checks below
+    domains = [d.upper() for d in effector_domains]
+
     # Check for DNMT presence (durable methylation)
-    has_dnmt = any("DNMT" in d.upper() for d in effector_domains)
-    has_krab = any("KRAB" in d.upper() for d in effector_domains)
-    has_activator = any(d.upper() in ["VP64", "VPR", "P65", "RTA"] for d in effector_domains)
-    has_eraser = any("TET" in d.upper() for d in effector_domains)
+    has_dnmt = any("DNMT" in d for d in domains)
+    has_krab = any("KRAB" in d for d in domains)
+    has_activator = not ACTIVATOR_DOMAINS.isdisjoint(domains)
+    has_eraser = any("TET" in d for d in domains)
 
     # Score based on durability profile
     if has_dnmt and has_krab:
@@ -38,15 +38,14 @@ def run():
     drug_links = 0
     editing_links = 0
 
+    # Build all company rows up front so they can be written in one batch
+    companies = []
     for row in rows:
         name = row.get("name", "").strip()
         if not name:
             continue
 
-        print(f"Processing: {name}")
-
-        # Build company data
-        company_data = {
+        companies.append((row, {
             "name": name,
             "ticker": row.get("ticker", "").strip() or None,
             "exchange": row.get("exchange", "").strip() or None,
@@ -54,10 +53,24 @@ def run():
             "website": row.get("website", "").strip() or None,
             "is_pure_play_epi": row.get("is_pure_play_epi", "").upper() == "TRUE",
             "epi_focus_score": float(row.get("epi_focus_score", 0) or 0),
-        }
+        }))
+
+    try:
+        company_ids = supabase_client.upsert_companies([data for _, data in companies])
+    except Exception as e:
+        print(f"  ERROR: Bulk company upsert failed: {e}")
+        return
+
+    # Link rows are collected here and written in bulk once every company is processed
+    drug_company_rows = []
+    asset_company_rows = []
+
+    for row, company_data in companies:
+        name = company_data["name"]
+        print(f"Processing: {name}")
 
         try:
-            company_id = supabase_client.upsert_company(company_data)
+            company_id = company_ids.get(name)
             if company_id:
                 print(f"  Upserted company: {name} (ID: {company_id[:8]}...)")
                 company_success += 1
@@ -69,7 +82,7 @@ def run():
                     for drug_name in drug_names:
                         drug = supabase_client.get_drug_by_name(drug_name)
                         if drug:
-                            supabase_client.insert_drug_company({
+                            drug_company_rows.append({
                                 "drug_id": drug["id"],
                                 "company_id": company_id,
                                 "role": "originator",
@@ -83,7 +96,7 @@ def run():
                 # Link editing assets by sponsor name
                 editing_assets = supabase_client.get_editing_asset_by_sponsor(name)
                 for asset in editing_assets:
-                    supabase_client.insert_editing_asset_company({
+                    asset_company_rows.append({
                         "editing_asset_id": asset["id"],
                         "company_id": company_id,
                         "role": "originator",
@@ -97,6 +110,13 @@ def run():
         except Exception as e:
             print(f"  ERROR: {e}")
 
+    try:
+        new_drug_links = supabase_client.insert_drug_companies(drug_company_rows)
+        new_editing_links = supabase_client.insert_editing_asset_companies(asset_company_rows)
+        print(f"\nInserted {new_drug_links} new drug links, {new_editing_links} new editing asset links")
+    except Exception as e:
+        print(f"  ERROR: Bulk link insert failed: {e}")
+
     print("\n" + "=" * 60)
     print(f"DONE: {company_success} companies seeded")
     print(f"      {drug_links} drug-company links created")
@@ -2,12 +2,17 @@
 14_update_market_caps.py
 
 Fetches market cap data from Yahoo Finance for all companies with tickers.
+Reads fast_info first and only falls back to the throttled .info endpoint
+when fast_info has no market cap.
 
 Run: python -m backend.etl.14_update_market_caps
 """
 
+import random
 import time
-from backend.etl.supabase_client import supabase
+from concurrent.futures import ThreadPoolExecutor
+from backend.etl.http_session import AdaptiveRateLimiter
+from backend.etl.supabase_client import fetch_all_rows, supabase, update_companies
 
 try:
     import yfinance as yf
@@ -17,6 +22,22 @@ except ImportError:
     subprocess.check_call(["pip", "install", "yfinance"])
     import yfinance as yf
 
+# Yahoo lookups are I/O bound; run several at once. The shared limiter starts
+# at YAHOO_MAX_RPS, halves on throttling and recovers gradually on success
+MAX_WORKERS = 8
+YAHOO_MAX_RPS = 2
+YAHOO_MAX_RETRIES = 3
+_yahoo_limiter = AdaptiveRateLimiter(YAHOO_MAX_RPS)
+
+
+def _is_throttled(error: Exception) -> bool:
+    message = str(error)
+    return (
+        type(error).__name__ == "YFRateLimitError"
+        or "429" in message or "401" in message
+        or "Too Many Requests" in message
+    )
+
 
 def format_market_cap(value: int | None) -> str:
     """Format market cap for display."""
@@ -31,68 +52,95 @@ def format_market_cap(value: int | None) -> str:
     return f"${value:,}"
 
 
-def get_market_cap(ticker: str) -> int | None:
-    """Fetch market cap from Yahoo Finance."""
+def _fast_market_cap(stock) -> float | None:
+    """Market cap from fast_info (price x shares), or None if unavailable.
+
+    Throttling errors are re-raised so the caller backs off instead of
+    retrying the ticker against the heavier .info endpoint.
+    """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        market_cap = info.get("marketCap")
-        if market_cap and isinstance(market_cap, (int, float)):
-            return int(market_cap)
-        return None
+        return stock.fast_info["marketCap"]
     except Exception as e:
-        print(f"    Error fetching {ticker}: {e}")
+        if _is_throttled(e):
+            raise
         return None
 
 
+def get_market_cap(ticker: str) -> int | None:
+    """Fetch market cap from Yahoo Finance, backing off and retrying when throttled."""
+    for attempt in range(YAHOO_MAX_RETRIES + 1):
+        try:
+            stock = yf.Ticker(ticker)
+            _yahoo_limiter.wait()
+            market_cap = _fast_market_cap(stock)
+            if market_cap is None:
+                # Fall back to the heavier quote-summary endpoint
+                _yahoo_limiter.wait()
+                market_cap = stock.info.get("marketCap")
+            _yahoo_limiter.success()
+            if market_cap and isinstance(market_cap, (int, float)):
+                return int(market_cap)
+            return None
+        except Exception as e:
+            if attempt < YAHOO_MAX_RETRIES and _is_throttled(e):
+                _yahoo_limiter.backoff()
+                print(f"    Throttled on {ticker}; now {_yahoo_limiter.rate:.2f} req/s, retrying")
+                time.sleep(random.uniform(5, 15))
+                continue
+            print(f"    Error fetching {ticker}: {e}")
+            return None
+
+
 def main():
     print("=" * 60)
     print("14_update_market_caps.py")
     print("Fetching Market Cap Data from Yahoo Finance")
     print("=" * 60)
 
-    # Get all companies with tickers
-    result = supabase.table("epi_companies").select("id, name, ticker, exchange, market_cap").execute()
-    companies = result.data
-
-    # Filter to companies with tickers (public companies)
-    public_companies = [c for c in companies if c.get("ticker")]
+    # Get companies with tickers (public companies); filter server-side and page
+    # past the PostgREST row cap
+    public_companies = fetch_all_rows(
+        lambda: supabase.table("epi_companies").select("id, name, ticker, market_cap")
+        .not_.is_("ticker", "null")
+    )
     print(f"\nFound {len(public_companies)} public companies with tickers.\n")
 
     updated = 0
     skipped = 0
     errors = 0
 
+    to_fetch = []
     for company in public_companies:
-        name = company["name"]
-        ticker = company["ticker"]
         current_cap = company.get("market_cap")
-
-        print(f"Processing: {name} ({ticker})")
-
         if current_cap:
-            print(f"  Already has market cap: {format_market_cap(current_cap)}")
+            print(f"Skipping: {company['name']} ({company['ticker']}) - already has market cap: {format_market_cap(current_cap)}")
             skipped += 1
             continue
+        to_fetch.append(company)
+
+    print(f"\nFetching market caps for {len(to_fetch)} companies ({MAX_WORKERS} workers)...\n")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        market_caps = list(executor.map(get_market_cap, [c["ticker"] for c in to_fetch]))
 
-        market_cap = get_market_cap(ticker)
+    updates = []
+    for company, market_cap in zip(to_fetch, market_caps):
+        print(f"Processing: {company['name']} ({company['ticker']})")
 
         if market_cap:
-            try:
-                supabase.table("epi_companies").update({
-                    "market_cap": market_cap
-                }).eq("id", company["id"]).execute()
-                print(f"  Updated: {format_market_cap(market_cap)}")
-                updated += 1
-            except Exception as e:
-                print(f"  Error updating: {e}")
-                errors += 1
+            updates.append({"id": company["id"], "name": company["name"], "market_cap": market_cap})
+            print(f"  Market cap: {format_market_cap(market_cap)}")
         else:
             print(f"  Could not fetch market cap")
             errors += 1
 
-        # Rate limit
-        time.sleep(0.5)
+    # One bulk upsert (chunked) instead of an UPDATE per company
+    if updates:
+        try:
+            updated = update_companies(updates)
+            print(f"\nUpdated {updated} companies")
+        except Exception as e:
+            print(f"\nError updating companies: {e}")
+            errors += len(updates)
 
     print("\n" + "=" * 60)
     print(f"DONE: {updated} companies updated")
@@ -8,11 +8,15 @@ This script:
 """
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
 from backend.etl.supabase_client import supabase
 from backend.etl import open_targets
 
+# Open Targets known-drug fetches in flight at once
+MAX_WORKERS = 4
+
 # Targets we specifically want to pull drugs for
 PRIORITY_TARGETS = ['NSD2', 'EP300', 'KAT2A', 'METTL7A', 'YTHDF1', 'H2AFY', 'ASXL1', 'PCSK9', 'MYC', 'DUX4']
 
@@ -30,13 +34,19 @@ def populate_missing_ot_ids():
 
     print(f"  Found {len(targets_missing)} targets without OT IDs")
 
+    try:
+        ot_results = open_targets.search_targets_by_symbols([t['symbol'] for t in targets_missing])
+    except Exception as e:
+        print(f"  ✗ Error: {e}")
+        return
+
     updated = 0
     for target in targets_missing:
         symbol = target['symbol']
         print(f"  Searching for {symbol}...", end=" ")
 
         try:
-            ot_result = open_targets.search_target_by_symbol(symbol)
+            ot_result = ot_results.get(symbol)
             if ot_result:
                 ot_id = ot_result['id']
                 supabase.table('epi_targets').update({
@@ -60,10 +70,10 @@ def fetch_drugs_for_targets():
     result = supabase.table('epi_targets').select('id, symbol, ot_target_id').execute()
     all_targets = {t['symbol']: t for t in result.data}
 
-    # Get existing drugs to avoid duplicates
-    existing_drugs = supabase.table('epi_drugs').select('chembl_id, name').execute().data
-    existing_chembl_ids = {d['chembl_id'] for d in existing_drugs if d['chembl_id']}
-    existing_names = {d['name'].upper() for d in existing_drugs}
+    # Get existing drugs to avoid duplicates (ID maps, so links need no extra lookup)
+    existing_drugs = supabase.table('epi_drugs').select('id, chembl_id, name').execute().data
+    existing_chembl_ids = {d['chembl_id']: d['id'] for d in existing_drugs if d['chembl_id']}
+    existing_names = {d['name'].upper(): d['id'] for d in existing_drugs}
 
     print(f"  Existing drugs: {len(existing_chembl_ids)} with ChEMBL IDs")
 
@@ -74,59 +84,64 @@ def fetch_drugs_for_targets():
     drugs_added = 0
     links_added = 0
 
-    for symbol in PRIORITY_TARGETS:
-        if symbol not in all_targets:
-            print(f"\n  ⚠️ {symbol} not found in epi_targets")
-            continue
-
-        target = all_targets[symbol]
-        ot_id = target.get('ot_target_id')
-
-        if not ot_id:
-            print(f"\n  ⚠️ {symbol} has no OT target ID - skipping")
-            continue
-
-        print(f"\n  📦 {symbol} ({ot_id})...")
+    # Start every priority target's known-drug fetch at once; results are
+    # consumed in order below
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        known_drugs = {
+            symbol: executor.submit(open_targets.fetch_known_drugs_for_target, all_targets[symbol]['ot_target_id'])
+            for symbol in PRIORITY_TARGETS
+            if symbol in all_targets and all_targets[symbol].get('ot_target_id')
+        }
+
+        for symbol in PRIORITY_TARGETS:
+            if symbol not in all_targets:
+                print(f"\n  ⚠️ {symbol} not found in epi_targets")
+                continue
 
-        try:
-            drugs = open_targets.fetch_known_drugs_for_target(ot_id)
-            print(f"    Found {len(drugs)} drug entries")
+            target = all_targets[symbol]
+            ot_id = target.get('ot_target_id')
 
-            if not drugs:
+            if not ot_id:
+                print(f"\n  ⚠️ {symbol} has no OT target ID - skipping")
                 continue
 
-            # Group by drug to dedupe
-            unique_drugs = {}
-            for entry in drugs:
-                drug_info = entry['drug']
-                drug_id = drug_info['id']  # ChEMBL ID
-                if drug_id not in unique_drugs:
-                    unique_drugs[drug_id] = {
-                        'chembl_id': drug_id,
-                        'name': drug_info['name'],
-                        'max_phase': drug_info.get('maximumClinicalTrialPhase', 0),
-                        'drug_type': drug_info.get('drugType', 'Small molecule'),
-                        'mechanisms': set(),
-                        'diseases': []
-                    }
-                unique_drugs[drug_id]['mechanisms'].add(entry.get('mechanismOfAction', ''))
-                if entry.get('disease'):
-                    unique_drugs[drug_id]['diseases'].append(entry['disease'])
-
-            print(f"    Unique drugs: {len(unique_drugs)}")
+            print(f"\n  📦 {symbol} ({ot_id})...")
 
-            for chembl_id, drug_data in unique_drugs.items():
-                drug_name = drug_data['name']
+            try:
+                drugs = known_drugs[symbol].result()
+                print(f"    Found {len(drugs)} drug entries")
 
-                # Check if already exists
-                if chembl_id in existing_chembl_ids or drug_name.upper() in existing_names:
-                    # Just ensure drug-target link exists
-                    existing_drug = supabase.table('epi_drugs').select('id').or_(
-                        f"chembl_id.eq.{chembl_id},name.ilike.{drug_name}"
-                    ).execute().data
+                if not drugs:
+                    continue
 
-                    if existing_drug:
-                        drug_id = existing_drug[0]['id']
+                # Group by drug to dedupe
+                unique_drugs = {}
+                for entry in drugs:
+                    drug_info = entry['drug']
+                    drug_id = drug_info['id']  # ChEMBL ID
+                    if drug_id not in unique_drugs:
+                        unique_drugs[drug_id] = {
+                            'chembl_id': drug_id,
+                            'name': drug_info['name'],
+                            'max_phase': drug_info.get('maximumClinicalTrialPhase', 0),
+                            'drug_type': drug_info.get('drugType', 'Small molecule'),
+                            'mechanisms': set(),
+                            'diseases': []
+                        }
+                    unique_drugs[drug_id]['mechanisms'].add(entry.get('mechanismOfAction', ''))
+                    if entry.get('disease'):
+                        unique_drugs[drug_id]['diseases'].append(entry['disease'])
+
+                print(f"    Unique drugs: {len(unique_drugs)}")
+
+                for chembl_id, drug_data in unique_drugs.items():
+                    drug_name = drug_data['name']
+
+                    # Check if already exists
+                    existing_drug_id = existing_chembl_ids.get(chembl_id) or existing_names.get(drug_name.upper())
+                    if existing_drug_id:
+                        # Just ensure drug-target link exists
+                        drug_id = existing_drug_id
                         if (drug_id, target['id']) not in existing_link_set:
                             # Create link
                             mechanism = list(drug_data['mechanisms'])[0] if drug_data['mechanisms'] else None
@@ -137,45 +152,45 @@ def fetch_drugs_for_targets():
                             }).execute()
                             links_added += 1
                             existing_link_set.add((drug_id, target['id']))
-                    continue
-
-                # Insert new drug
-                mechanism = list(drug_data['mechanisms'])[0] if drug_data['mechanisms'] else None
-
-                # Determine if approved (phase 4 = approved)
-                phase = drug_data['max_phase']
-                is_approved = phase == 4
-
-                new_drug = {
-                    'name': drug_name,
-                    'chembl_id': chembl_id,
-                    'drug_type': drug_data['drug_type'],
-                    'fda_approved': is_approved,
-                    'source': 'OpenTargets',
-                    'modality': 'small_molecule' if 'small' in drug_data['drug_type'].lower() else 'biologic'
-                }
-
-                result = supabase.table('epi_drugs').insert(new_drug).execute()
-                drug_id = result.data[0]['id']
-                drugs_added += 1
-                existing_chembl_ids.add(chembl_id)
-                existing_names.add(drug_name.upper())
-
-                print(f"    + {drug_name} ({chembl_id}) {'[Approved]' if is_approved else ''}")
-
-                # Create drug-target link
-                supabase.table('epi_drug_targets').insert({
-                    'drug_id': drug_id,
-                    'target_id': target['id'],
-                    'mechanism_of_action': mechanism
-                }).execute()
-                links_added += 1
-                existing_link_set.add((drug_id, target['id']))
+                        continue
+
+                    # Insert new drug
+                    mechanism = list(drug_data['mechanisms'])[0] if drug_data['mechanisms'] else None
+
+                    # Determine if approved (phase 4 = approved)
+                    phase = drug_data['max_phase']
+                    is_approved = phase == 4
+
+                    new_drug = {
+                        'name': drug_name,
+                        'chembl_id': chembl_id,
+                        'drug_type': drug_data['drug_type'],
+                        'fda_approved': is_approved,
+                        'source': 'OpenTargets',
+                        'modality': 'small_molecule' if 'small' in drug_data['drug_type'].lower() else 'biologic'
+                    }
 
-        except Exception as e:
-            print(f"    ✗ Error: {e}")
-            import traceback
-            traceback.print_exc()
+                    result = supabase.table('epi_drugs').insert(new_drug).execute()
+                    drug_id = result.data[0]['id']
+                    drugs_added += 1
+                    existing_chembl_ids[chembl_id] = drug_id
+                    existing_names[drug_name.upper()] = drug_id
+
+                    print(f"    + {drug_name} ({chembl_id}) {'[Approved]' if is_approved else ''}")
+
+                    # Create drug-target link
+                    supabase.table('epi_drug_targets').insert({
+                        'drug_id': drug_id,
+                        'target_id': target['id'],
+                        'mechanism_of_action': mechanism
+                    }).execute()
+                    links_added += 1
+                    existing_link_set.add((drug_id, target['id']))
+
+            except Exception as e:
+                print(f"    ✗ Error: {e}")
+                import traceback
+                traceback.print_exc()
 
     return drugs_added, links_added
 
@@ -21,7 +21,6 @@ from backend.etl.supabase_client import (
     supabase,
     upsert_epi_drug,
     insert_epi_drug_target,
-    get_epi_target_by_symbol,
 )
 
 
@@ -49,16 +48,27 @@ def seed_flagship_drugs():
     skipped = 0
     linked = 0
 
+    # Prefetch existing drugs and targets in one query each
+    drug_names = [d["name"].strip() for d in drugs]
+    target_symbols = list({d["target_symbol"].strip() for d in drugs})
+    existing_drugs = {
+        d["name"]: d["id"]
+        for d in supabase.table("epi_drugs").select("id, name").in_("name", drug_names).execute().data
+    }
+    targets = {
+        t["symbol"]: t
+        for t in supabase.table("epi_targets").select("id, symbol").in_("symbol", target_symbols).execute().data
+    }
+
     for drug in drugs:
         drug_name = drug["name"].strip()
         target_symbol = drug["target_symbol"].strip()
 
         # Check if drug already exists
-        existing = supabase.table("epi_drugs").select("id").eq("name", drug_name).execute()
-        if existing.data:
+        if drug_name in existing_drugs:
             print(f"  [SKIP] {drug_name} already exists")
             skipped += 1
-            drug_id = existing.data[0]["id"]
+            drug_id = existing_drugs[drug_name]
         else:
             # Insert drug
             drug_data = {
@@ -78,11 +88,12 @@ def seed_flagship_drugs():
                 max_phase = None
 
             drug_id = upsert_epi_drug(drug_data)
+            existing_drugs[drug_name] = drug_id
             print(f"  [ADD] {drug_name} (ID: {drug_id})")
             added += 1
 
         # Link to target
-        target = get_epi_target_by_symbol(target_symbol)
+        target = targets.get(target_symbol)
         if target:
             insert_epi_drug_target({
                 "drug_id": drug_id,
@@ -12,13 +12,18 @@ Usage:
     python -m backend.etl.21_expand_drugs_all_targets
 """
 
+import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
 from backend.etl.supabase_client import supabase
 from backend.etl import open_targets
 
+# Open Targets known-drug fetches in flight at once
+MAX_WORKERS = 4
+
 # Minimum drugs per target before we consider it "covered"
 MIN_DRUGS_PER_TARGET = 2
 
@@ -32,6 +37,14 @@ ONCOLOGY_EFO_PREFIXES = [
     'MONDO_0004992', # cancer
     'MONDO_0005070', # neoplasm
 ]
+# Ontology namespaces (EFO, MONDO) of the prefixes above, for str.startswith
+_ONCOLOGY_ID_NAMESPACES = tuple({p.split('_')[0] for p in ONCOLOGY_EFO_PREFIXES})
+
+# Cancer-related disease name terms, matched in one case-insensitive scan
+ONCOLOGY_TERMS = ['cancer', 'carcinoma', 'lymphoma', 'leukemia', 'myeloma',
+                  'tumor', 'tumour', 'neoplasm', 'melanoma', 'sarcoma',
+                  'glioma', 'glioblastoma', 'blastoma']
+_ONCOLOGY_TERMS_RE = re.compile('|'.join(map(re.escape, ONCOLOGY_TERMS)), re.IGNORECASE)
 
 
 def get_targets_needing_drugs():
@@ -78,13 +91,19 @@ def populate_missing_ot_ids(targets):
 
     print(f"  {len(missing)} targets need OT ID lookup")
 
+    try:
+        ot_results = open_targets.search_targets_by_symbols([t['symbol'] for t in missing])
+    except Exception as e:
+        print(f"  ✗ Error: {e}")
+        return
+
     updated = 0
     for target in missing:
         symbol = target['symbol']
         print(f"  Looking up {symbol}...", end=" ")
 
         try:
-            ot_result = open_targets.search_target_by_symbol(symbol)
+            ot_result = ot_results.get(symbol)
             if ot_result:
                 ot_id = ot_result['id']
                 supabase.table('epi_targets').update({
@@ -109,17 +128,11 @@ def is_oncology_relevant(diseases):
     for disease in diseases:
         if not disease:
             continue
-        efo_id = disease.get('id', '')
-        # Check if starts with any oncology prefix
-        for prefix in ONCOLOGY_EFO_PREFIXES:
-            if efo_id.startswith(prefix.split('_')[0]):  # Match EFO or MONDO prefix
-                return True
+        # Check if starts with any oncology prefix (EFO or MONDO namespace)
+        if disease.get('id', '').startswith(_ONCOLOGY_ID_NAMESPACES):
+            return True
         # Also check name for cancer-related terms
-        name = disease.get('name', '').lower()
-        oncology_terms = ['cancer', 'carcinoma', 'lymphoma', 'leukemia', 'myeloma',
-                         'tumor', 'tumour', 'neoplasm', 'melanoma', 'sarcoma',
-                         'glioma', 'glioblastoma', 'blastoma']
-        if any(term in name for term in oncology_terms):
+        if _ONCOLOGY_TERMS_RE.search(disease.get('name', '')):
             return True
 
     return False
@@ -142,115 +155,123 @@ def fetch_drugs_for_all_targets(targets):
     links_added = 0
     skipped_non_oncology = 0
 
-    for i, target in enumerate(targets):
-        symbol = target['symbol']
-        ot_id = target.get('ot_target_id')
+    # Fetch every target's known drugs up front in a worker pool; the loop
+    # below consumes them in order while later fetches are still running
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        known_drugs = {
+            t['id']: executor.submit(open_targets.fetch_known_drugs_for_target, t['ot_target_id'])
+            for t in targets if t.get('ot_target_id')
+        }
 
-        if not ot_id:
-            print(f"\n  [{i+1}/{len(targets)}] ⚠️ {symbol} - no OT ID, skipping")
-            continue
+        for i, target in enumerate(targets):
+            symbol = target['symbol']
+            ot_id = target.get('ot_target_id')
 
-        print(f"\n  [{i+1}/{len(targets)}] {symbol} (currently {target['current_drug_count']} drugs)")
+            if not ot_id:
+                print(f"\n  [{i+1}/{len(targets)}] ⚠️ {symbol} - no OT ID, skipping")
+                continue
 
-        try:
-            drugs = open_targets.fetch_known_drugs_for_target(ot_id)
+            print(f"\n  [{i+1}/{len(targets)}] {symbol} (currently {target['current_drug_count']} drugs)")
 
-            if not drugs:
-                print(f"    No drugs found in Open Targets")
-                continue
+            try:
+                drugs = known_drugs[target['id']].result()
 
-            # Group by drug to dedupe
-            unique_drugs = {}
-            for entry in drugs:
-                drug_info = entry['drug']
-                drug_id = drug_info['id']  # ChEMBL ID
-
-                if drug_id not in unique_drugs:
-                    unique_drugs[drug_id] = {
-                        'chembl_id': drug_id,
-                        'name': drug_info['name'],
-                        'max_phase': drug_info.get('maximumClinicalTrialPhase', 0),
-                        'drug_type': drug_info.get('drugType', 'Small molecule'),
-                        'mechanisms': set(),
-                        'diseases': []
-                    }
-
-                moa = entry.get('mechanismOfAction', '')
-                if moa:
-                    unique_drugs[drug_id]['mechanisms'].add(moa)
-
-                if entry.get('disease'):
-                    unique_drugs[drug_id]['diseases'].append(entry['disease'])
-
-            print(f"    Found {len(unique_drugs)} unique drugs")
-
-            added_for_target = 0
-            for chembl_id, drug_data in unique_drugs.items():
-                drug_name = drug_data['name']
-
-                # Check oncology relevance
-                if not is_oncology_relevant(drug_data['diseases']):
-                    skipped_non_oncology += 1
+                if not drugs:
+                    print(f"    No drugs found in Open Targets")
                     continue
 
-                # Check if drug already exists
-                existing_drug_id = existing_chembl_ids.get(chembl_id) or existing_names.get(drug_name.upper())
-
-                if existing_drug_id:
-                    # Drug exists - just check if link exists
-                    if (existing_drug_id, target['id']) not in existing_link_set:
+                # Group by drug to dedupe
+                unique_drugs = {}
+                for entry in drugs:
+                    drug_info = entry['drug']
+                    drug_id = drug_info['id']  # ChEMBL ID
+
+                    if drug_id not in unique_drugs:
+                        unique_drugs[drug_id] = {
+                            'chembl_id': drug_id,
+                            'name': drug_info['name'],
+                            'max_phase': drug_info.get('maximumClinicalTrialPhase', 0),
+                            'drug_type': drug_info.get('drugType', 'Small molecule'),
+                            'mechanisms': set(),
+                            'diseases': []
+                        }
+
+                    moa = entry.get('mechanismOfAction', '')
+                    if moa:
+                        unique_drugs[drug_id]['mechanisms'].add(moa)
+
+                    if entry.get('disease'):
+                        unique_drugs[drug_id]['diseases'].append(entry['disease'])
+
+                print(f"    Found {len(unique_drugs)} unique drugs")
+
+                added_for_target = 0
+                for chembl_id, drug_data in unique_drugs.items():
+                    drug_name = drug_data['name']
+
+                    # Check oncology relevance
+                    if not is_oncology_relevant(drug_data['diseases']):
+                        skipped_non_oncology += 1
+                        continue
+
+                    # Check if drug already exists
+                    existing_drug_id = existing_chembl_ids.get(chembl_id) or existing_names.get(drug_name.upper())
+
+                    if existing_drug_id:
+                        # Drug exists - just check if link exists
+                        if (existing_drug_id, target['id']) not in existing_link_set:
+                            mechanism = list(drug_data['mechanisms'])[0] if drug_data['mechanisms'] else None
+                            supabase.table('epi_drug_targets').insert({
+                                'drug_id': existing_drug_id,
+                                'target_id': target['id'],
+                                'mechanism_of_action': mechanism,
+                                'is_primary_target': True
+                            }).execute()
+                            links_added += 1
+                            existing_link_set.add((existing_drug_id, target['id']))
+                            print(f"    → Linked existing {drug_name}")
+                    else:
+                        # Insert new drug
                         mechanism = list(drug_data['mechanisms'])[0] if drug_data['mechanisms'] else None
+                        phase = drug_data['max_phase']
+                        is_approved = phase == 4
+
+                        new_drug = {
+                            'name': drug_name,
+                            'chembl_id': chembl_id,
+                            'drug_type': drug_data['drug_type'],
+                            'fda_approved': is_approved,
+                            'source': 'OpenTargets',
+                            'modality': 'small_molecule' if 'small' in drug_data['drug_type'].lower() else 'biologic'
+                        }
+
+                        result = supabase.table('epi_drugs').insert(new_drug).execute()
+                        new_drug_id = result.data[0]['id']
+                        drugs_added += 1
+                        added_for_target += 1
+                        existing_chembl_ids[chembl_id] = new_drug_id
+                        existing_names[drug_name.upper()] = new_drug_id
+
+                        # Create drug-target link
                         supabase.table('epi_drug_targets').insert({
-                            'drug_id': existing_drug_id,
+                            'drug_id': new_drug_id,
                             'target_id': target['id'],
                             'mechanism_of_action': mechanism,
                             'is_primary_target': True
                         }).execute()
                         links_added += 1
-                        existing_link_set.add((existing_drug_id, target['id']))
-                        print(f"    → Linked existing {drug_name}")
-                else:
-                    # Insert new drug
-                    mechanism = list(drug_data['mechanisms'])[0] if drug_data['mechanisms'] else None
-                    phase = drug_data['max_phase']
-                    is_approved = phase == 4
-
-                    new_drug = {
-                        'name': drug_name,
-                        'chembl_id': chembl_id,
-                        'drug_type': drug_data['drug_type'],
-                        'fda_approved': is_approved,
-                        'source': 'OpenTargets',
-                        'modality': 'small_molecule' if 'small' in drug_data['drug_type'].lower() else 'biologic'
-                    }
-
-                    result = supabase.table('epi_drugs').insert(new_drug).execute()
-                    new_drug_id = result.data[0]['id']
-                    drugs_added += 1
-                    added_for_target += 1
-                    existing_chembl_ids[chembl_id] = new_drug_id
-                    existing_names[drug_name.upper()] = new_drug_id
-
-                    # Create drug-target link
-                    supabase.table('epi_drug_targets').insert({
-                        'drug_id': new_drug_id,
-                        'target_id': target['id'],
-                        'mechanism_of_action': mechanism,
-                        'is_primary_target': True
-                    }).execute()
-                    links_added += 1
-                    existing_link_set.add((new_drug_id, target['id']))
-
-                    phase_str = f"Phase {phase}" if phase else "Preclinical"
-                    print(f"    + {drug_name} ({phase_str})")
-
-            if added_for_target > 0:
-                print(f"    Added {added_for_target} new drugs for {symbol}")
+                        existing_link_set.add((new_drug_id, target['id']))
 
-        except Exception as e:
-            print(f"    ✗ Error: {e}")
-            import traceback
-            traceback.print_exc()
+                        phase_str = f"Phase {phase}" if phase else "Preclinical"
+                        print(f"    + {drug_name} ({phase_str})")
+
+                if added_for_target > 0:
+                    print(f"    Added {added_for_target} new drugs for {symbol}")
+
+            except Exception as e:
+                print(f"    ✗ Error: {e}")
+                import traceback
+                traceback.print_exc()
 
     return drugs_added, links_added, skipped_non_oncology
 
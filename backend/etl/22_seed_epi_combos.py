@@ -14,6 +14,7 @@ Usage:
 """
 
 import csv
+from collections import Counter
 from pathlib import Path
 from backend.etl.supabase_client import (
     supabase,
@@ -112,12 +113,9 @@ def print_summary():
     print("\n📊 Combos by label:")
     try:
         combos = supabase.table("epi_combos").select("combo_label").execute().data
-        label_counts = {}
-        for c in combos:
-            label = c["combo_label"]
-            label_counts[label] = label_counts.get(label, 0) + 1
+        label_counts = Counter(c["combo_label"] for c in combos)
 
-        for label, count in sorted(label_counts.items(), key=lambda x: -x[1]):
+        for label, count in label_counts.most_common():
             print(f"  {label}: {count}")
     except Exception as e:
         print(f"  Error fetching summary: {e}")
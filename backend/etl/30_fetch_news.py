@@ -34,6 +34,8 @@ import json
 import argparse
 import hashlib
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 import feedparser
@@ -45,7 +47,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 load_dotenv()
 
-from supabase import create_client, Client
+from supabase import Client
+from backend.etl.http_session import RateLimiter, make_session
+from backend.etl.supabase_client import get_client
 import google.generativeai as genai
 
 # ============================================================================
@@ -56,6 +60,14 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Gemini request budget (requests per second across the whole run)
+GEMINI_MAX_RPS = 4
+# Articles analysed concurrently (calls are I/O-bound and independent)
+AI_WORKERS = 4
+# The article analysis is a small JSON object; cap generation accordingly
+GEMINI_MAX_OUTPUT_TOKENS = 1024
+GEMINI_MAX_RETRIES = 3
+
 # RSS Feed URLs
 RSS_FEEDS = {
     "nature_drug_discovery": {
@@ -79,6 +91,12 @@ RSS_FEEDS = {
     },
 }
 
+# One keep-alive session for every feed (feedparser opens a new connection per URL)
+_FEED_SESSION = make_session(pool_size=len(RSS_FEEDS))
+
+# Per-feed ETag / Last-Modified from the previous run; unchanged feeds answer 304
+FEED_STATE_PATH = os.path.join(os.path.dirname(__file__), ".cache", "rss_feed_state.json")
+
 # Base epigenetic keywords - will be enriched with database symbols
 BASE_EPI_KEYWORDS = [
     # Core terms
@@ -108,6 +126,10 @@ _db_targets_cache = None
 _db_drugs_cache = None
 _db_companies_cache = None
 
+def _normalize_name(name: str) -> str:
+    """Canonical form for entity lookups: uppercased, whitespace collapsed."""
+    return " ".join(name.upper().split())
+
 def load_db_targets(supabase: Client) -> dict:
     """Load target symbols from database for entity linking."""
     global _db_targets_cache
@@ -117,12 +139,12 @@ def load_db_targets(supabase: Client) -> dict:
     try:
         result = supabase.table("epi_targets").select("id, symbol, name").execute()
         _db_targets_cache = {
-            t["symbol"].upper(): t["id"] for t in result.data
+            _normalize_name(t["symbol"]): t["id"] for t in result.data
         }
         # Also add full names as keys
         for t in result.data:
             if t.get("name"):
-                _db_targets_cache[t["name"].upper()] = t["id"]
+                _db_targets_cache[_normalize_name(t["name"])] = t["id"]
         return _db_targets_cache
     except Exception as e:
         print(f"  Warning: Could not load targets: {e}")
@@ -137,7 +159,7 @@ def load_db_drugs(supabase: Client) -> dict:
     try:
         result = supabase.table("epi_drugs").select("id, name").execute()
         _db_drugs_cache = {
-            d["name"].upper(): d["id"] for d in result.data
+            _normalize_name(d["name"]): d["id"] for d in result.data
         }
         return _db_drugs_cache
     except Exception as e:
@@ -154,9 +176,9 @@ def load_db_companies(supabase: Client) -> dict:
         result = supabase.table("epi_companies").select("id, name, ticker").execute()
         _db_companies_cache = {}
         for c in result.data:
-            _db_companies_cache[c["name"].upper()] = c["id"]
+            _db_companies_cache[_normalize_name(c["name"])] = c["id"]
             if c.get("ticker"):
-                _db_companies_cache[c["ticker"].upper()] = c["id"]
+                _db_companies_cache[_normalize_name(c["ticker"])] = c["id"]
         return _db_companies_cache
     except Exception as e:
         print(f"  Warning: Could not load companies: {e}")
@@ -164,20 +186,54 @@ def load_db_companies(supabase: Client) -> dict:
 
 def get_enriched_keywords(supabase: Client) -> list:
     """Build keyword list enriched with database symbols."""
-    keywords = list(BASE_EPI_KEYWORDS)
+    # Deduplicate as we go rather than building a list and converting it
+    keywords = set(BASE_EPI_KEYWORDS)
 
     # Add target symbols
     targets = load_db_targets(supabase)
-    for symbol in targets.keys():
-        if len(symbol) >= 3:  # Skip very short symbols to avoid false positives
-            keywords.append(symbol.lower())
+    keywords.update(
+        symbol.lower() for symbol in targets
+        if len(symbol) >= 3  # Skip very short symbols to avoid false positives
+    )
 
     # Add drug names
     drugs = load_db_drugs(supabase)
-    for name in drugs.keys():
-        keywords.append(name.lower())
-
-    return list(set(keywords))
+    keywords.update(name.lower() for name in drugs)
+
+    return list(keywords)
+
+# Fallback for names the AI punctuates or spaces differently from the DB
+# ("HDAC-6" vs "HDAC6"): compare alphanumerics only. Anything looser (edit
+# distance, bigram similarity) links numbered paralogs such as "SIRTUIN 1"
+# to "SIRTUIN 2", so letters and digits must match exactly.
+_compact_indexes = {}
+
+def _compact(name: str) -> str:
+    return "".join(ch for ch in name if ch.isalnum())
+
+def _compact_index(kind: str, lookup: dict) -> dict:
+    """{compact key: id} over a lookup's keys, built once per kind.
+    Compact forms shared by different IDs are left out as ambiguous."""
+    index = _compact_indexes.get(kind)
+    if index is None:
+        index = {}
+        ambiguous = set()
+        for key, entity_id in lookup.items():
+            compact = _compact(key)
+            if index.setdefault(compact, entity_id) != entity_id:
+                ambiguous.add(compact)
+        for compact in ambiguous:
+            del index[compact]
+        _compact_indexes[kind] = index
+    return index
+
+def _match_entity(kind: str, name: str, lookup: dict) -> Optional[str]:
+    """Exact normalized match first, then a punctuation/spacing-insensitive one."""
+    normalized = _normalize_name(name)
+    if normalized in lookup:
+        return lookup[normalized]
+    compact = _compact(normalized)
+    return _compact_index(kind, lookup).get(compact) if compact else None
 
 def link_entities_to_db(entities: dict, supabase: Client) -> dict:
     """Link extracted entity names to database IDs."""
@@ -196,23 +252,16 @@ def link_entities_to_db(entities: dict, supabase: Client) -> dict:
         "linked_company_ids": [],
     }
 
-    # Link targets
-    for target_name in entities.get("targets", []):
-        target_upper = target_name.upper()
-        if target_upper in targets:
-            linked["linked_target_ids"].append(targets[target_upper])
-
-    # Link drugs
-    for drug_name in entities.get("drugs", []):
-        drug_upper = drug_name.upper()
-        if drug_upper in drugs:
-            linked["linked_drug_ids"].append(drugs[drug_upper])
-
-    # Link companies
-    for company_name in entities.get("companies", []):
-        company_upper = company_name.upper()
-        if company_upper in companies:
-            linked["linked_company_ids"].append(companies[company_upper])
+    # Link targets, drugs and companies
+    for kind, lookup, field in (
+        ("targets", targets, "linked_target_ids"),
+        ("drugs", drugs, "linked_drug_ids"),
+        ("companies", companies, "linked_company_ids"),
+    ):
+        for entity_name in entities.get(kind, []):
+            entity_id = _match_entity(kind, entity_name, lookup)
+            if entity_id:
+                linked[field].append(entity_id)
 
     return linked
 
@@ -223,12 +272,31 @@ def link_entities_to_db(entities: dict, supabase: Client) -> dict:
 def get_supabase() -> Client:
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return get_client(SUPABASE_URL, SUPABASE_KEY)
 
 # ============================================================================
 # Gemini AI Client
 # ============================================================================
 
+_gemini_limiter = RateLimiter(GEMINI_MAX_RPS)
+
+def _is_rate_limited(error: Exception) -> bool:
+    return "429" in str(error) or type(error).__name__ == "ResourceExhausted"
+
+def generate_with_backoff(model, prompt: str):
+    """Rate-limited generate_content, retried with exponential backoff on 429s."""
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        _gemini_limiter.wait()
+        try:
+            return model.generate_content(
+                prompt,
+                generation_config=genai.GenerationConfig(max_output_tokens=GEMINI_MAX_OUTPUT_TOKENS),
+            )
+        except Exception as e:
+            if attempt == GEMINI_MAX_RETRIES or not _is_rate_limited(e):
+                raise
+            time.sleep(2 ** attempt)
+
 def get_gemini_model():
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY must be set")
@@ -239,8 +307,33 @@ def get_gemini_model():
 # RSS Fetching
 # ============================================================================
 
-def fetch_rss_feed(source_key: str) -> list[dict]:
-    """Fetch and parse an RSS feed."""
+def load_feed_state() -> dict:
+    """Load saved feed validators ({url: {"etag", "modified"}})."""
+    try:
+        with open(FEED_STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_feed_state(feed_state: dict) -> None:
+    os.makedirs(os.path.dirname(FEED_STATE_PATH), exist_ok=True)
+    tmp_path = f"{FEED_STATE_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(feed_state, f)
+    os.replace(tmp_path, FEED_STATE_PATH)
+
+def fetch_rss_feed(
+    source_key: str,
+    feed_state: Optional[dict] = None,
+    new_validators: Optional[dict] = None,
+) -> list[dict]:
+    """Fetch and parse an RSS feed.
+
+    With `feed_state`, sends the saved ETag / Last-Modified and returns []
+    when the feed is unchanged (304). The response's validators go into
+    `new_validators`; the caller copies them to `feed_state` once the feed's
+    articles are safely stored.
+    """
     feed_config = RSS_FEEDS.get(source_key)
     if not feed_config:
         print(f"  Unknown source: {source_key}")
@@ -254,7 +347,31 @@ def fetch_rss_feed(source_key: str) -> list[dict]:
     print(f"  Fetching {feed_config['name']}...")
 
     try:
-        feed = feedparser.parse(url)
+        validators = (feed_state or {}).get(url, {})
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("modified"):
+            headers["If-Modified-Since"] = validators["modified"]
+
+        response = _FEED_SESSION.get(url, headers=headers, timeout=30)
+        if response.status_code == 304:
+            print(f"  Not modified since last run")
+            return []
+        response.raise_for_status()
+
+        etag = response.headers.get("ETag")
+        modified = response.headers.get("Last-Modified")
+        if new_validators is not None and (etag or modified):
+            new_validators[url] = {"etag": etag, "modified": modified}
+
+        # Keep HTML sanitising on: titles are stored as-is and end up in digest
+        # emails. No link is followed, so skip relative-URI rewriting.
+        feed = feedparser.parse(
+            response.content,
+            response_headers={k.lower(): v for k, v in response.headers.items()},
+            resolve_relative_uris=False,
+        )
 
         if feed.bozo:
             print(f"  Warning: Feed parsing issue - {feed.bozo_exception}")
@@ -304,10 +421,14 @@ def fetch_rss_feed(source_key: str) -> list[dict]:
         print(f"  Error fetching {source_key}: {e}")
         return []
 
-def is_epigenetics_relevant(article: dict, keywords: list) -> bool:
+def compile_keywords(keywords: list) -> re.Pattern:
+    """Compile keywords into one alternation so each article is scanned once."""
+    return re.compile("|".join(re.escape(keyword.lower()) for keyword in keywords))
+
+def is_epigenetics_relevant(article: dict, keyword_pattern: re.Pattern) -> bool:
     """Check if article is relevant to epigenetics/oncology."""
     text = f"{article['title']} {article['abstract']}".lower()
-    return any(keyword in text for keyword in keywords)
+    return keyword_pattern.search(text) is not None
 
 # ============================================================================
 # AI Processing with Hardened JSON Parsing
@@ -343,14 +464,12 @@ def parse_ai_json(text: str) -> Optional[dict]:
 
     return None
 
-def process_with_ai(article: dict, model, retry_on_fail: bool = True) -> dict:
-    """Use Gemini to analyze article and extract entities."""
+# Static prompt text, formatted per article
+_ARTICLE_PROMPT_TEMPLATE = """Analyze this scientific article about drug discovery/oncology.
 
-    prompt = f"""Analyze this scientific article about drug discovery/oncology.
-
-TITLE: {article['title']}
+TITLE: {title}
 
-ABSTRACT: {article['abstract'][:1500]}
+ABSTRACT: {abstract}
 
 Respond with a JSON object containing:
 {{
@@ -367,8 +486,16 @@ Respond with a JSON object containing:
 Focus on epigenetic drugs, targets, and mechanisms. Be specific about drug names and targets.
 Respond ONLY with the JSON object, no other text."""
 
+def process_with_ai(article: dict, model, retry_on_fail: bool = True) -> dict:
+    """Use Gemini to analyze article and extract entities."""
+
+    prompt = _ARTICLE_PROMPT_TEMPLATE.format(
+        title=article['title'],
+        abstract=article['abstract'][:1500],
+    )
+
     try:
-        response = model.generate_content(prompt)
+        response = generate_with_backoff(model, prompt)
         text = response.text.strip()
 
         result = parse_ai_json(text)
@@ -391,7 +518,7 @@ TITLE: {article['title']}
     "companies": [],
     "key_finding": "main finding"
 }}"""
-                retry_response = model.generate_content(retry_prompt)
+                retry_response = generate_with_backoff(model, retry_prompt)
                 result = parse_ai_json(retry_response.text.strip())
 
             if result is None:
@@ -492,6 +619,8 @@ def run_news_fetch(
         supabase = None
         keywords = BASE_EPI_KEYWORDS
 
+    keyword_pattern = compile_keywords(keywords)
+
     if not skip_ai:
         model = get_gemini_model()
     else:
@@ -520,18 +649,30 @@ def run_news_fetch(
         "entities_linked": 0,
     }
 
+    # Conditional requests only for real runs, so a dry run always sees the full feeds
+    feed_state = None if dry_run else load_feed_state()
+    # Validators from this run, held back per feed until its articles are stored
+    new_validators = {}
+
     # Process each source
-    for source_key in feed_keys:
+    # Feeds are independent: download them concurrently (wall time ~ slowest feed)
+    with ThreadPoolExecutor(max_workers=max(1, len(feed_keys))) as executor:
+        feed_articles = list(executor.map(lambda key: fetch_rss_feed(key, feed_state, new_validators), feed_keys))
+
+    for source_key, articles in zip(feed_keys, feed_articles):
         print(f"\n--- {source_key} ---")
 
-        articles = fetch_rss_feed(source_key)
         stats["fetched"] += len(articles)
+        # Only advance the feed's validators if nothing from it needs a retry
+        feed_complete = True
 
+        # Pass 1: relevance + duplicate filtering (cheap, serial)
+        pending = []
         for article in articles:
             print(f"\n  Processing: {article['title'][:60]}...")
 
             # Filter for relevance
-            if filter_relevant and not is_epigenetics_relevant(article, keywords):
+            if filter_relevant and not is_epigenetics_relevant(article, keyword_pattern):
                 print(f"    Skipping (not epigenetics-related)")
                 stats["skipped_irrelevant"] += 1
                 continue
@@ -545,15 +686,26 @@ def run_news_fetch(
                 continue
 
             stats["new"] += 1
+            pending.append(article)
 
-            # AI processing
-            if model:
-                print(f"    Running AI analysis...")
-                ai_result = process_with_ai(article, model)
+        # Pass 2: AI analysis for all new articles, bounded concurrency
+        if model and pending:
+            print(f"\n  Running AI analysis on {len(pending)} articles ({AI_WORKERS} workers)...")
+            with ThreadPoolExecutor(max_workers=AI_WORKERS) as executor:
+                ai_results = list(executor.map(lambda a: process_with_ai(a, model), pending))
+        else:
+            ai_results = [None] * len(pending)
+
+        # Pass 3: entity linking + inserts (serial, in feed order)
+        for article, ai_result in zip(pending, ai_results):
+            print(f"\n  {article['title'][:60]}...")
+
+            if ai_result is not None:
                 article.update(ai_result)
 
                 if ai_result.get("ai_confidence", 0) == 0:
                     stats["ai_parse_failures"] += 1
+                    feed_complete = False
 
                 print(f"    Category: {ai_result['ai_category']}, Impact: {ai_result['ai_impact_flag']}")
 
@@ -588,12 +740,21 @@ def run_news_fetch(
                 if insert_article(supabase, record):
                     print(f"    Inserted into staging")
                     stats["inserted"] += 1
+                else:
+                    feed_complete = False
             else:
                 print(f"    [DRY RUN] Would insert")
                 stats["inserted"] += 1
 
+        # A 304 next run would hide anything that failed here, so keep the old
+        # validators unless every article was stored with its AI analysis
+        url = RSS_FEEDS[source_key]["url"]
+        if feed_state is not None and not skip_ai and feed_complete and url in new_validators:
+            feed_state[url] = new_validators[url]
+
     # Log ETL run
     if not dry_run:
+        save_feed_state(feed_state)
         log_etl_run(supabase, stats, feed_keys)
 
     # Summary
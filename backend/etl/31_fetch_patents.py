@@ -13,8 +13,9 @@ USPTO PatentsView API (New PatentSearch API):
 - US patents only
 - Rate limit: 45 requests/minute
 
-Environment Variable:
+Environment Variables:
     PATENTSVIEW_API_KEY - Your PatentsView API key
+    PATENTSVIEW_MAX_RPM - Requests/minute your key allows (default 45)
 
 Usage:
     python -m backend.etl.31_fetch_patents --strategy all
@@ -24,17 +25,26 @@ Usage:
 
 import argparse
 import os
-import time
+import re
 import json
 from datetime import datetime, timedelta
 from typing import Optional
 import requests
 
-from backend.etl.supabase_client import supabase
+from backend.etl import supabase_client
+from backend.etl.http_session import RateLimiter, json_dumps, json_loads, make_session
 
 # USPTO PatentsView API (new ElasticSearch-based API)
 PATENTSVIEW_API = "https://search.patentsview.org/api/v1/patent/"
 
+# One keep-alive session for every page of every strategy in a run
+_SESSION = make_session()
+
+# The quota is per API key; every request goes through this limiter, so
+# the full budget is used (response time counts toward the spacing)
+PATENTSVIEW_MAX_RPM = float(os.getenv("PATENTSVIEW_MAX_RPM", "45"))
+_PATENTSVIEW_LIMITER = RateLimiter(PATENTSVIEW_MAX_RPM / 60)
+
 # ============ Search Configurations ============
 
 # Known epigenetic/oncology companies (assignee search)
@@ -117,6 +127,12 @@ PATENT_CATEGORIES = {
     "epi_tool": ["chromatin", "histone modification", "DNA methylation", "gene silencing"],
 }
 
+# One case-insensitive alternation per category, checked in PATENT_CATEGORIES order
+_PATENT_CATEGORY_PATTERNS = tuple(
+    (category, re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE))
+    for category, keywords in PATENT_CATEGORIES.items()
+)
+
 
 def get_api_key() -> str:
     """Get PatentsView API key from environment."""
@@ -131,42 +147,38 @@ def get_api_key() -> str:
 
 def classify_patent(title: str, abstract: str) -> str:
     """Classify patent into a category based on title/abstract keywords."""
-    text = f"{title} {abstract}".lower()
+    text = f"{title} {abstract}"
 
-    for category, keywords in PATENT_CATEGORIES.items():
-        for keyword in keywords:
-            if keyword.lower() in text:
-                return category
+    for category, pattern in _PATENT_CATEGORY_PATTERNS:
+        if pattern.search(text):
+            return category
 
     return "epi_tool"  # Default category
 
 
+# Target symbols to look for (each listed once)
+PATENT_TARGET_SYMBOLS = (
+    "HDAC1", "HDAC2", "HDAC3", "HDAC6", "HDAC8",
+    "BRD2", "BRD3", "BRD4", "BRDT",
+    "EZH1", "EZH2",
+    "DOT1L", "PRMT5", "PRMT1",
+    "LSD1", "KDM1A", "KDM5A", "KDM5B", "KDM4A", "KDM6A", "KDM6B",
+    "DNMT1", "DNMT3A", "DNMT3B",
+    "TET1", "TET2", "TET3",
+    "IDH1", "IDH2",
+    "NSD1", "NSD2", "SETD2",
+    "SIRT1", "SIRT2", "SIRT6",
+    "CBP", "EP300", "CREBBP",
+    "PCSK9",  # Not classical epi but related
+)
+
+
 def extract_target_symbols(title: str, abstract: str) -> list:
     """Extract epigenetic target symbols mentioned in patent."""
     text = f"{title} {abstract}".upper()
 
-    # Target symbols to look for
-    targets = [
-        "HDAC1", "HDAC2", "HDAC3", "HDAC6", "HDAC8",
-        "BRD2", "BRD3", "BRD4", "BRDT",
-        "EZH1", "EZH2",
-        "DOT1L", "PRMT5", "PRMT1",
-        "LSD1", "KDM1A", "KDM5A", "KDM5B", "KDM4A", "KDM6A", "KDM6B",
-        "DNMT1", "DNMT3A", "DNMT3B",
-        "TET1", "TET2", "TET3",
-        "IDH1", "IDH2",
-        "NSD1", "NSD2", "SETD2",
-        "SIRT1", "SIRT2", "SIRT6",
-        "CBP", "EP300", "CREBBP",
-        "PCSK9",  # Not classical epi but related
-    ]
-
-    found = []
-    for target in targets:
-        if target in text:
-            found.append(target)
-
-    return list(set(found))
+    # Symbols are unique, so no set round trip is needed to dedupe
+    return [target for target in PATENT_TARGET_SYMBOLS if target in text]
 
 
 def build_query_payload(keywords: list, field: str = "patent_abstract", size: int = 100, page: int = 1) -> dict:
@@ -248,14 +260,15 @@ def fetch_patents(api_key: str, keywords: list, field: str, per_page: int = 100,
         payload = build_query_payload(keywords, field, size=per_page, page=page)
 
         try:
-            response = requests.post(
+            _PATENTSVIEW_LIMITER.wait()
+            response = _SESSION.post(
                 PATENTSVIEW_API,
                 headers=headers,
-                json=payload,
+                data=json_dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
 
             patents = data.get("patents", [])
             if not patents:
@@ -269,10 +282,7 @@ def fetch_patents(api_key: str, keywords: list, field: str, per_page: int = 100,
             if len(all_patents) >= total_count:
                 break
 
-            # Rate limit: 45 requests/minute = ~1.3 sec between requests
-            time.sleep(1.5)
-
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:  # ValueError: malformed JSON body
             print(f"  Error fetching page {page}: {e}")
             # Try to get error details
             try:
@@ -326,37 +336,23 @@ def process_patent(patent: dict) -> dict:
     }
 
 
-def upsert_patent(patent: dict, dry_run: bool = False) -> bool:
-    """Upsert a patent to the database.
+def upsert_patents(patents: list, dry_run: bool = False) -> int:
+    """Upsert processed patents to the database in chunked bulk writes.
 
-    Returns True if inserted/updated, False if skipped.
+    Returns the number of patents inserted/updated.
     """
     if dry_run:
-        targets = patent.get('related_target_symbols', []) or []
-        target_str = f" [{', '.join(targets)}]" if targets else ""
-        print(f"  [DRY RUN] {patent['patent_number']}: {patent['title'][:50]}...{target_str}")
-        return True
+        for patent in patents:
+            targets = patent.get('related_target_symbols', []) or []
+            target_str = f" [{', '.join(targets)}]" if targets else ""
+            print(f"  [DRY RUN] {patent['patent_number']}: {patent['title'][:50]}...{target_str}")
+        return len(patents)
 
     try:
-        # Check if exists
-        existing = supabase.table("epi_patents").select("id").eq(
-            "patent_number", patent["patent_number"]
-        ).execute()
-
-        if existing.data:
-            # Update
-            supabase.table("epi_patents").update(patent).eq(
-                "patent_number", patent["patent_number"]
-            ).execute()
-            return True
-        else:
-            # Insert
-            supabase.table("epi_patents").insert(patent).execute()
-            return True
-
+        return supabase_client.upsert_patents(patents)
     except Exception as e:
-        print(f"  Error upserting {patent['patent_number']}: {e}")
-        return False
+        print(f"  Error upserting {len(patents)} patents: {e}")
+        return 0
 
 
 def run_strategy(api_key: str, strategy: str, keywords: list, field: str,
@@ -386,11 +382,7 @@ def run_strategy(api_key: str, strategy: str, keywords: list, field: str,
     print(f"\nFound {len(patents)} patents")
 
     # Process and upsert
-    upserted = 0
-    for patent in patents:
-        processed = process_patent(patent)
-        if upsert_patent(processed, dry_run=dry_run):
-            upserted += 1
+    upserted = upsert_patents([process_patent(p) for p in patents], dry_run=dry_run)
 
     print(f"Upserted {upserted} patents")
     return len(patents)
@@ -433,7 +425,6 @@ def main():
         for name, (keywords, field) in strategies.items():
             count = run_strategy(api_key, name, keywords, field, dry_run=args.dry_run, limit=args.limit)
             total_found += count
-            time.sleep(2)  # Pause between strategies
     else:
         keywords, field = strategies[args.strategy]
         total_found = run_strategy(api_key, keywords, field, dry_run=args.dry_run, limit=args.limit)
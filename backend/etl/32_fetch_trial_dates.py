@@ -13,26 +13,33 @@ TIER 3 (Discovery): Query by mechanism keywords to find NEW trials
     we don't know about yet.
 
 API: ClinicalTrials.gov API v2 (https://clinicaltrials.gov/data-api/api)
-Rate Limit: ~50 requests/minute (we use 2-sec delays)
+Rate Limit: ~50 requests/minute (shared limiter across worker threads)
 
 Usage:
     python -m backend.etl.32_fetch_trial_dates
     python -m backend.etl.32_fetch_trial_dates --tier tier2
     python -m backend.etl.32_fetch_trial_dates --drug VORINOSTAT
     python -m backend.etl.32_fetch_trial_dates --dry-run
+    python -m backend.etl.32_fetch_trial_dates --tier tier1 --no-cache
 """
 
 import argparse
+import hashlib
+import threading
 import os
 import sys
-import time
 import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 import requests
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from backend.etl.http_session import RateLimiter, json_dumps, json_loads, make_session
 from backend.etl.supabase_client import supabase
 
 # ============================================================================
@@ -41,6 +48,32 @@ from backend.etl.supabase_client import supabase
 
 CTGOV_API = "https://clinicaltrials.gov/api/v2/studies"
 
+# One keep-alive session for all CT.gov calls in a run
+_SESSION = make_session()
+
+# CT.gov allows ~50 requests/minute; every request goes through this limiter
+CTGOV_MAX_RPS = 0.8
+_CTGOV_LIMITER = RateLimiter(CTGOV_MAX_RPS)
+
+# On-disk cache for Tier 1 study records, so a re-run (or a run resumed after
+# a failure) only re-downloads studies older than CACHE_TTL_SECONDS. Stale
+# studies are refetched in the same filter.ids batches as missing ones.
+CACHE_DIR = Path(__file__).parent / ".cache" / "ctgov"
+CACHE_TTL_SECONDS = 7 * 86400
+_cache_enabled = True
+
+# Tier 2/3 search results are cached for a day (keyed by the query), so a
+# re-run the same day repeats no searches
+QUERY_CACHE_TTL_SECONDS = 86400
+_query_cache_stats = {"hits": 0, "misses": 0}
+_query_cache_lock = threading.Lock()
+
+# NCT IDs requested per filter.ids batch (Tier 1)
+NCT_BATCH_SIZE = 100
+
+# Concurrent query streams for Tier 2/3 (the limiter bounds the request rate)
+CTGOV_WORKERS = 4
+
 # Oncology conditions for Tier 2 filtering
 ONCOLOGY_CONDITIONS = [
     "neoplasm", "neoplasms", "cancer", "tumor", "tumour",
@@ -69,7 +102,8 @@ MECHANISM_QUERIES = [
     "epigenetic modifier",
 ]
 
-# Fields to fetch from CT.gov
+# Fields to fetch from CT.gov; full records (descriptions, eligibility,
+# results) are many times larger than what parse_study reads
 CTGOV_FIELDS = [
     "NCTId",
     "BriefTitle",
@@ -92,26 +126,109 @@ CTGOV_FIELDS = [
     "InterventionName",
     "ConditionName",
 ]
+_CTGOV_FIELDS_PARAM = ",".join(CTGOV_FIELDS)
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
 
 # ============================================================================
 # API Functions
 # ============================================================================
 
-def fetch_study_by_nct(nct_id: str) -> Optional[dict]:
-    """Fetch a single study by NCT ID (Tier 1)."""
-    url = f"{CTGOV_API}/{nct_id}"
-    params = {"format": "json"}
+def _study_cache_path(nct_id: str) -> Path:
+    return CACHE_DIR / f"{hashlib.sha1(nct_id.encode()).hexdigest()}.json"
 
+
+def _read_cache_entry(path: Path) -> Optional[dict]:
+    """Load a cache entry ({"payload"}); None if missing or unreadable."""
     try:
-        response = requests.get(url, params=params, timeout=30)
-        if response.status_code == 404:
-            print(f"    NCT ID not found: {nct_id}")
+        entry = json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None  # Missing or corrupt entry - refetch
+    return entry if isinstance(entry, dict) and "payload" in entry else None
+
+
+def _write_cache_entry(path: Path, entry: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(json_dumps(entry))
+    tmp.replace(path)
+
+
+def _fetch_nct_batch(batch: list) -> Optional[dict]:
+    """Request one batch of studies with filter.ids; None if any page fails."""
+    params = {
+        "format": "json",
+        "fields": _CTGOV_FIELDS_PARAM,
+        "filter.ids": ",".join(batch),
+        "pageSize": len(batch),
+    }
+    studies = {}
+    page_token = None
+    while True:
+        if page_token:
+            params["pageToken"] = page_token
+        try:
+            _CTGOV_LIMITER.wait()
+            response = _SESSION.get(CTGOV_API, params=params, timeout=60)
+            response.raise_for_status()
+            data = json_loads(response.content)
+        except (requests.RequestException, ValueError) as e:  # ValueError: malformed JSON body
+            print(f"    Error fetching {len(batch)} studies: {e}")
             return None
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"    Error fetching {nct_id}: {e}")
-        return None
+
+        for study in data.get("studies", []):
+            nct_id = study.get("protocolSection", {}).get("identificationModule", {}).get("nctId")
+            if nct_id:
+                studies[nct_id] = study
+
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            return studies
+
+
+def fetch_studies_by_nct(nct_ids: list) -> tuple:
+    """Fetch many studies by NCT ID (Tier 1), returns ({nct_id: study}, failed_ids).
+
+    Fresh cache entries are served from disk; the rest are requested
+    NCT_BATCH_SIZE at a time with filter.ids instead of one call per study.
+    A failed batch is split in half and retried down to single IDs, so one
+    malformed ID or transient error only costs the IDs it actually affects.
+    IDs CT.gov doesn't return are left out; IDs that could not be fetched
+    are returned in failed_ids.
+    """
+    studies = {}
+    missing = []
+    for nct_id in dict.fromkeys(nct_ids):
+        path = _study_cache_path(nct_id)
+        entry = _read_cache_entry(path) if _cache_enabled else None
+        if entry and time.time() - path.stat().st_mtime < CACHE_TTL_SECONDS:
+            studies[nct_id] = entry["payload"]
+        else:
+            missing.append(nct_id)
+
+    failed = []
+    batches = [missing[start:start + NCT_BATCH_SIZE] for start in range(0, len(missing), NCT_BATCH_SIZE)]
+    while batches:
+        batch = batches.pop()
+        fetched = _fetch_nct_batch(batch)
+        if fetched is None:
+            if len(batch) == 1:
+                failed.append(batch[0])
+            else:
+                mid = len(batch) // 2
+                batches.extend([batch[mid:], batch[:mid]])
+            continue
+
+        for nct_id, study in fetched.items():
+            studies[nct_id] = study
+            if _cache_enabled:
+                _write_cache_entry(_study_cache_path(nct_id), {"payload": study})
+
+    return studies, failed
 
 
 def fetch_studies_by_query(
@@ -127,13 +244,26 @@ def fetch_studies_by_query(
     - query.intr: Intervention/treatment name
     - query.cond: Condition/disease
     - query.spons: Sponsor name
+
+    Complete results are cached on disk for QUERY_CACHE_TTL_SECONDS.
     """
+    key = json_dumps([intervention, condition, sponsor, page_size, max_pages])
+    path = CACHE_DIR / "queries" / f"{hashlib.sha1(key).hexdigest()}.json"
+    entry = _read_cache_entry(path) if _cache_enabled else None
+    fresh = entry and time.time() - path.stat().st_mtime < QUERY_CACHE_TTL_SECONDS
+    with _query_cache_lock:
+        _query_cache_stats["hits" if fresh else "misses"] += 1
+    if fresh:
+        return entry["payload"]
+
     all_studies = []
     page_token = None
+    complete = True
 
     for page in range(max_pages):
         params = {
             "format": "json",
+            "fields": _CTGOV_FIELDS_PARAM,
             "pageSize": page_size,
         }
 
@@ -153,9 +283,10 @@ def fetch_studies_by_query(
             params["pageToken"] = page_token
 
         try:
-            response = requests.get(CTGOV_API, params=params, timeout=30)
+            _CTGOV_LIMITER.wait()
+            response = _SESSION.get(CTGOV_API, params=params, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
 
             studies = data.get("studies", [])
             if not studies:
@@ -169,18 +300,19 @@ def fetch_studies_by_query(
             if not page_token:
                 break
 
-            # Rate limiting
-            time.sleep(2)
-
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:  # ValueError: malformed JSON body
             print(f"    Error on page {page + 1}: {e}")
+            complete = False
             break
 
+    # Partial results (a page failed) are returned but not cached
+    if _cache_enabled and complete:
+        _write_cache_entry(path, {"payload": all_studies})
     return all_studies
 
 
-def parse_study(study: dict, drug_id: str = None, drug_name: str = None, query_tier: str = None) -> dict:
-    """Parse CT.gov study into our schema."""
+def parse_study(study: dict, drug_id: str = None, drug_name: str = None, query_tier: str = None, ts: str = None) -> dict:
+    """Parse CT.gov study into our schema. `ts` stamps last_api_update (defaults to now)."""
     proto = study.get("protocolSection", {})
 
     id_module = proto.get("identificationModule", {})
@@ -212,7 +344,7 @@ def parse_study(study: dict, drug_id: str = None, drug_name: str = None, query_t
         "study_completion_date": parse_date(scd.get("date")),
         "study_completion_type": scd.get("type"),
         "start_date": parse_date(start.get("date")),
-        "results_first_posted": parse_date(status_module.get("resultsFirstPostedDateStruct", {}).get("date")),
+        "results_first_posted": parse_date(status_module.get("resultsFirstPostDateStruct", {}).get("date")),
         "phase": phase,
         "status": status_module.get("overallStatus"),
         "drug_id": drug_id,
@@ -226,12 +358,13 @@ def parse_study(study: dict, drug_id: str = None, drug_name: str = None, query_t
         "source": "clinicaltrials.gov",
         "source_url": f"https://clinicaltrials.gov/study/{nct_id}",
         "query_tier": query_tier,
-        "last_api_update": datetime.now(timezone.utc).isoformat(),
+        "last_api_update": ts or _now_iso(),
     }
 
 
+@lru_cache(maxsize=4096)
 def parse_date(date_str: str) -> Optional[str]:
-    """Parse CT.gov date string to ISO format."""
+    """Parse CT.gov date string to ISO format (memoised: values repeat across studies)."""
     if not date_str:
         return None
 
@@ -292,27 +425,34 @@ def run_tier1_curated(dry_run: bool = False) -> dict:
     drugs = supabase.table("epi_drugs").select("id, name").execute()
     drug_map = {d["name"]: d["id"] for d in drugs.data}
 
+    # Every curated study in a few batched requests
+    studies, failed = fetch_studies_by_nct([t["nct_id"] for t in curated_list if t.get("nct_id")])
+    failed = set(failed)
+
     for trial in curated_list:
         nct_id = trial.get("nct_id")
         drug_name = trial.get("drug_name")
         drug_id = drug_map.get(drug_name)
 
-        print(f"  Fetching {nct_id} ({drug_name})...")
+        print(f"  {nct_id} ({drug_name})...")
 
-        study = fetch_study_by_nct(nct_id)
+        study = studies.get(nct_id)
         if not study:
+            if nct_id in failed:
+                print(f"    Fetch failed: {nct_id}")
+            else:
+                print(f"    NCT ID not found: {nct_id}")
             stats["errors"] += 1
             continue
 
         stats["found"] += 1
-        parsed = parse_study(study, drug_id=drug_id, drug_name=drug_name, query_tier="tier1_curated")
+        ts = _now_iso()
+        parsed = parse_study(study, drug_id=drug_id, drug_name=drug_name, query_tier="tier1_curated", ts=ts)
 
         if dry_run:
             print(f"    [DRY RUN] Would upsert: {parsed['nct_id']} - {parsed['trial_title'][:50]}...")
         else:
-            upsert_trial(parsed, stats)
-
-        time.sleep(1)
+            upsert_trial(parsed, stats, ts=ts)
 
     return stats
 
@@ -338,33 +478,37 @@ def run_tier2_oncology(drug_filter: str = None, dry_run: bool = False) -> dict:
     # Simple oncology condition filter
     oncology_filter = "cancer OR neoplasm OR leukemia OR lymphoma OR myeloma OR carcinoma"
 
-    for drug in drugs.data:
-        drug_name = drug["name"]
-        drug_id = drug["id"]
-
-        print(f"\n  Querying: {drug_name}")
-
-        studies = fetch_studies_by_query(
-            intervention=drug_name,
+    def search(drug: dict) -> list:
+        return fetch_studies_by_query(
+            intervention=drug["name"],
             condition=oncology_filter,
             page_size=50,
             max_pages=3
         )
 
+    # Drug queries are independent; fetch concurrently under the shared
+    # CT.gov limiter and write results serially in the original order
+    with ThreadPoolExecutor(max_workers=CTGOV_WORKERS) as executor:
+        results = list(executor.map(search, drugs.data))
+
+    for drug, studies in zip(drugs.data, results):
+        drug_name = drug["name"]
+        drug_id = drug["id"]
+
+        print(f"\n  Querying: {drug_name}")
         print(f"    Found {len(studies)} oncology trials")
         stats["found"] += len(studies)
 
+        # One timestamp per fetched batch
+        ts = _now_iso()
         for study in studies:
-            parsed = parse_study(study, drug_id=drug_id, drug_name=drug_name, query_tier="tier2_oncology")
+            parsed = parse_study(study, drug_id=drug_id, drug_name=drug_name, query_tier="tier2_oncology", ts=ts)
 
             if dry_run:
                 pcd = parsed.get("primary_completion_date", "N/A")
                 print(f"    [DRY RUN] {parsed['nct_id']} | Phase: {parsed['phase']} | PCD: {pcd}")
             else:
-                upsert_trial(parsed, stats)
-
-        # Rate limiting between drugs
-        time.sleep(3)
+                upsert_trial(parsed, stats, ts=ts)
 
     return stats
 
@@ -383,32 +527,37 @@ def run_tier3_discovery(dry_run: bool = False) -> dict:
 
     print(f"  {len(existing_ncts)} trials already in database")
 
-    for mechanism in MECHANISM_QUERIES:
-        print(f"\n  Searching: '{mechanism}' + cancer")
-
-        studies = fetch_studies_by_query(
+    def search(mechanism: str) -> list:
+        return fetch_studies_by_query(
             intervention=mechanism,
             condition="cancer|neoplasm|leukemia|lymphoma|myeloma",
             page_size=50,
             max_pages=2
         )
 
+    # Mechanism queries are independent; run the paginated searches concurrently
+    # and process results in the original order
+    with ThreadPoolExecutor(max_workers=CTGOV_WORKERS) as executor:
+        results = list(executor.map(search, MECHANISM_QUERIES))
+
+    for mechanism, studies in zip(MECHANISM_QUERIES, results):
+        print(f"\n  Searching: '{mechanism}' + cancer")
+
         new_studies = [s for s in studies if s.get("protocolSection", {}).get("identificationModule", {}).get("nctId") not in existing_ncts]
 
         print(f"    Found {len(studies)} trials, {len(new_studies)} are new")
         stats["found"] += len(new_studies)
 
+        ts = _now_iso()
         for study in new_studies:
-            parsed = parse_study(study, query_tier="tier3_discovery")
+            parsed = parse_study(study, query_tier="tier3_discovery", ts=ts)
 
             if dry_run:
                 print(f"    [DRY RUN] NEW: {parsed['nct_id']} - {parsed['trial_title'][:50]}...")
             else:
-                upsert_trial(parsed, stats)
+                upsert_trial(parsed, stats, ts=ts)
                 existing_ncts.add(parsed["nct_id"])
 
-        time.sleep(3)
-
     return stats
 
 
@@ -416,15 +565,15 @@ def run_tier3_discovery(dry_run: bool = False) -> dict:
 # Database Functions
 # ============================================================================
 
-def upsert_trial(trial: dict, stats: dict) -> None:
-    """Upsert a trial to ci_trial_calendar."""
+def upsert_trial(trial: dict, stats: dict, ts: str = None) -> None:
+    """Upsert a trial to ci_trial_calendar. `ts` stamps updated_at (defaults to now)."""
     try:
         # Check if exists
         existing = supabase.table("ci_trial_calendar").select("id").eq("nct_id", trial["nct_id"]).execute()
 
         if existing.data:
             # Update
-            trial["updated_at"] = datetime.now(timezone.utc).isoformat()
+            trial["updated_at"] = ts or _now_iso()
             supabase.table("ci_trial_calendar").update(trial).eq("nct_id", trial["nct_id"]).execute()
             stats["updated"] += 1
         else:
@@ -463,8 +612,13 @@ def main():
                         help="Which tier to run")
     parser.add_argument("--drug", type=str, help="Filter to specific drug name (Tier 2 only)")
     parser.add_argument("--dry-run", action="store_true", help="Don't write to database")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk CT.gov study and query caches")
     args = parser.parse_args()
 
+    if args.no_cache:
+        global _cache_enabled
+        _cache_enabled = False
+
     print("CT.gov Trial Calendar Fetcher")
     print(f"Tier: {args.tier}")
     print(f"Dry run: {args.dry_run}")
@@ -499,6 +653,7 @@ def main():
     print(f"  Inserted: {total_stats['inserted']}")
     print(f"  Updated: {total_stats['updated']}")
     print(f"  Errors: {total_stats['errors']}")
+    print(f"  Query cache: {_query_cache_stats['hits']} hits, {_query_cache_stats['misses']} misses")
 
 
 if __name__ == "__main__":
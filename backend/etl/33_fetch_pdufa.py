@@ -21,6 +21,7 @@ import argparse
 import feedparser
 import requests
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from supabase import create_client, Client
@@ -55,6 +56,19 @@ EPI_DRUG_KEYWORDS = [
     # Mechanism keywords
     "epigenetic", "chromatin", "histone methyltransferase"
 ]
+_EPI_DRUG_KEYWORDS_LOWER = tuple(k.lower() for k in EPI_DRUG_KEYWORDS)
+
+# Drug-name normalisation for linking: drop trademark signs, brackets and
+# commas; treat hyphens, underscores and slashes as spaces
+_DRUG_NAME_TABLE = str.maketrans(
+    {**{c: None for c in "()[]®™,"}, **{c: " " for c in "-_/"}}
+)
+
+
+@lru_cache(maxsize=10_000)
+def normalize_drug_name(name: str) -> str:
+    """Canonical lowercase form of a drug name (memoised: names repeat across records)."""
+    return " ".join(name.translate(_DRUG_NAME_TABLE).lower().split())
 
 
 def get_seed_file_path() -> str:
@@ -186,15 +200,17 @@ def check_fda_rss(dry_run: bool = False) -> List[Dict]:
                 content = title + " " + summary
 
                 # Check if entry matches any epigenetic drug keywords
-                for keyword in EPI_DRUG_KEYWORDS:
-                    if keyword.lower() in content:
+                for keyword in _EPI_DRUG_KEYWORDS_LOWER:
+                    if keyword in content:
                         matching_entries.append({
                             "title": entry.get('title'),
                             "link": entry.get('link'),
                             "published": entry.get('published'),
                             "summary": entry.get('summary', '')[:500],
                             "matched_keyword": keyword,
-                            "feed_source": feed_url
+                            "feed_source": feed_url,
+                            # Flagged here while the lowercased title is at hand
+                            "is_approval": "approv" in title
                         })
                         print(f"    Found match: {entry.get('title')[:80]}...")
                         break
@@ -214,8 +230,13 @@ def update_pdufa_from_rss(entries: List[Dict], dry_run: bool = False) -> int:
         Number of records updated
     """
     updated = 0
+    outcome_date = datetime.now().date().isoformat()
 
     for entry in entries:
+        # Only approval announcements can close out a pending PDUFA date
+        if not entry["is_approval"]:
+            continue
+
         title = entry['title'].lower()
 
         # Try to find matching pending PDUFA record
@@ -226,7 +247,7 @@ def update_pdufa_from_rss(entries: List[Dict], dry_run: bool = False) -> int:
         for record in pending.data:
             drug_name = record['drug_name'].lower()
 
-            if drug_name in title and "approv" in title:
+            if drug_name in title:
                 if dry_run:
                     print(f"  [DRY RUN] Would mark as approved: {record['drug_name']}")
                     updated += 1
@@ -235,7 +256,7 @@ def update_pdufa_from_rss(entries: List[Dict], dry_run: bool = False) -> int:
                 # Update status to approved
                 update_data = {
                     "status": "approved",
-                    "outcome_date": datetime.now().date().isoformat(),
+                    "outcome_date": outcome_date,
                     "outcome_notes": f"FDA approved - {entry['title'][:200]}",
                     "source_url": entry.get('link')
                 }
@@ -366,25 +387,32 @@ def link_to_epi_drugs(dry_run: bool = False) -> int:
 
     # Get all epi_drugs for matching
     drugs = supabase.table("epi_drugs").select("id, name").execute()
-    drug_map = {d['name'].lower(): d['id'] for d in drugs.data}
+    drug_map = {normalize_drug_name(d['name']): d['id'] for d in drugs.data}
 
+    # Several PDUFA records (indications, resubmissions) share a drug name:
+    # normalise each name once and link all of a drug's records in one update
+    records_by_name = {}
     for record in pdufa_records.data:
-        drug_name_lower = record['drug_name'].lower()
+        records_by_name.setdefault(normalize_drug_name(record['drug_name']), []).append(record)
 
-        if drug_name_lower in drug_map:
-            drug_id = drug_map[drug_name_lower]
+    for drug_name_key, records in records_by_name.items():
+        drug_id = drug_map.get(drug_name_key)
+        if drug_id is None:
+            continue
 
-            if dry_run:
+        if dry_run:
+            for record in records:
                 print(f"  [DRY RUN] Would link: {record['drug_name']} -> {drug_id}")
-                linked += 1
-                continue
+            linked += len(records)
+            continue
 
-            supabase.table("ci_pdufa_dates").update({
-                "drug_id": drug_id
-            }).eq("id", record['id']).execute()
+        supabase.table("ci_pdufa_dates").update({
+            "drug_id": drug_id
+        }).in_("id", [record['id'] for record in records]).execute()
 
+        for record in records:
             print(f"  Linked: {record['drug_name']} -> {drug_id}")
-            linked += 1
+        linked += len(records)
 
     return linked
 
@@ -21,6 +21,8 @@ from typing import Optional, Dict, List, Any, Tuple
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from backend.etl.supabase_client import iter_rows
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -129,9 +131,9 @@ def classify_significance(
 # Snapshot Management
 # ============================================================
 
-def save_snapshot(entity_type: str, entity_id: str, data: Dict[str, Any]) -> None:
-    """Save a snapshot of an entity's current state."""
-    today = date.today().isoformat()
+def save_snapshot(entity_type: str, entity_id: str, data: Dict[str, Any], today: Optional[str] = None) -> None:
+    """Save a snapshot of an entity's current state (today: ISO date, defaults to now)."""
+    today = today or date.today().isoformat()
 
     try:
         supabase.table("ci_entity_snapshots").upsert({
@@ -148,9 +150,9 @@ def save_snapshot(entity_type: str, entity_id: str, data: Dict[str, Any]) -> Non
             raise
 
 
-def get_previous_snapshot(entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
-    """Get the most recent snapshot before today."""
-    today = date.today().isoformat()
+def get_previous_snapshot(entity_type: str, entity_id: str, today: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Get the most recent snapshot before today (ISO date, defaults to now)."""
+    today = today or date.today().isoformat()
 
     try:
         result = supabase.table("ci_entity_snapshots")\
@@ -180,12 +182,12 @@ def detect_drug_changes(dry_run: bool = False) -> List[Dict]:
     """Detect changes in epi_drugs table."""
     print("\n📊 Detecting drug changes...")
 
-    # Get current drugs
-    result = supabase.table("epi_drugs")\
-        .select("id, name, chembl_id, max_phase, fda_approved, drug_type, modality")\
-        .execute()
+    # One snapshot date for the whole pass, however long it runs
+    today = date.today().isoformat()
 
-    drugs = result.data or []
+    # Stream current drugs page by page
+    drugs = iter_rows(lambda: supabase.table("epi_drugs")
+                      .select("id, name, chembl_id, max_phase, fda_approved, drug_type, modality"))
     changes = []
 
     for drug in drugs:
@@ -199,7 +201,7 @@ def detect_drug_changes(dry_run: bool = False) -> List[Dict]:
         }
 
         # Get previous snapshot
-        previous = get_previous_snapshot("drug", drug_id)
+        previous = get_previous_snapshot("drug", drug_id, today)
 
         if previous is None:
             # New drug
@@ -240,7 +242,7 @@ def detect_drug_changes(dry_run: bool = False) -> List[Dict]:
 
         # Save current snapshot
         if not dry_run:
-            save_snapshot("drug", drug_id, current_data)
+            save_snapshot("drug", drug_id, current_data, today)
 
     print(f"   Found {len(changes)} drug changes")
     return changes
@@ -250,12 +252,11 @@ def detect_trial_changes(dry_run: bool = False) -> List[Dict]:
     """Detect changes in ci_trial_calendar table."""
     print("\n🔬 Detecting trial changes...")
 
-    # Get current trials
-    result = supabase.table("ci_trial_calendar")\
-        .select("id, nct_id, trial_title, drug_id, drug_name, phase, status, primary_completion_date, primary_completion_type, enrollment")\
-        .execute()
+    today = date.today().isoformat()
 
-    trials = result.data or []
+    # Get current trials
+    trials = iter_rows(lambda: supabase.table("ci_trial_calendar")
+                       .select("id, nct_id, trial_title, drug_id, drug_name, phase, status, primary_completion_date, primary_completion_type, enrollment"))
     changes = []
 
     for trial in trials:
@@ -271,7 +272,7 @@ def detect_trial_changes(dry_run: bool = False) -> List[Dict]:
         }
 
         # Get previous snapshot
-        previous = get_previous_snapshot("trial", trial_id)
+        previous = get_previous_snapshot("trial", trial_id, today)
 
         if previous is None:
             # New trial
@@ -323,7 +324,7 @@ def detect_trial_changes(dry_run: bool = False) -> List[Dict]:
 
         # Save current snapshot
         if not dry_run:
-            save_snapshot("trial", trial_id, current_data)
+            save_snapshot("trial", trial_id, current_data, today)
 
     print(f"   Found {len(changes)} trial changes")
     return changes
@@ -333,6 +334,8 @@ def detect_news_changes(dry_run: bool = False) -> List[Dict]:
     """Detect newly approved news in epi_news_staging table."""
     print("\n📰 Detecting news changes...")
 
+    today = date.today().isoformat()
+
     # Get approved news from the last 7 days
     from datetime import timedelta
     seven_days_ago = (date.today() - timedelta(days=7)).isoformat()
@@ -356,7 +359,7 @@ def detect_news_changes(dry_run: bool = False) -> List[Dict]:
         news_id = str(news["id"])
 
         # Check if we already have a snapshot (already processed)
-        previous = get_previous_snapshot("news", news_id)
+        previous = get_previous_snapshot("news", news_id, today)
 
         if previous is None:
             # New approved news article
@@ -397,7 +400,7 @@ def detect_news_changes(dry_run: bool = False) -> List[Dict]:
                     "status": "approved",
                     "impact": impact,
                     "category": news.get("ai_category"),
-                })
+                }, today)
 
     print(f"   Found {len(changes)} news changes")
     return changes
@@ -407,6 +410,8 @@ def detect_patent_changes(dry_run: bool = False) -> List[Dict]:
     """Detect new patents in epi_patents table."""
     print("\n📜 Detecting patent changes...")
 
+    today = date.today().isoformat()
+
     try:
         result = supabase.table("epi_patents")\
             .select("id, patent_number, title, assignee, category, related_target_symbols, source_url, pub_date")\
@@ -426,7 +431,7 @@ def detect_patent_changes(dry_run: bool = False) -> List[Dict]:
         patent_id = patent.get("patent_number") or str(patent["id"])
 
         # Check if we already have a snapshot
-        previous = get_previous_snapshot("patent", patent_id)
+        previous = get_previous_snapshot("patent", patent_id, today)
 
         if previous is None:
             # New patent
@@ -466,7 +471,7 @@ def detect_patent_changes(dry_run: bool = False) -> List[Dict]:
                     "title": patent.get("title"),
                     "category": category,
                     "assignee": patent.get("assignee"),
-                })
+                }, today)
 
     print(f"   Found {len(changes)} patent changes")
     return changes
@@ -476,6 +481,8 @@ def detect_pdufa_changes(dry_run: bool = False) -> List[Dict]:
     """Detect changes in PDUFA dates (ci_pdufa_dates table)."""
     print("\n📅 Detecting PDUFA changes...")
 
+    today = date.today().isoformat()
+
     try:
         result = supabase.table("ci_pdufa_dates")\
             .select("id, drug_name, company_name, company_ticker, application_type, indication, pdufa_date, pdufa_date_type, status, drug_id")\
@@ -504,7 +511,7 @@ def detect_pdufa_changes(dry_run: bool = False) -> List[Dict]:
         }
 
         # Get previous snapshot
-        previous = get_previous_snapshot("pdufa", pdufa_id)
+        previous = get_previous_snapshot("pdufa", pdufa_id, today)
 
         if previous is None:
             # New PDUFA date being tracked
@@ -580,7 +587,7 @@ def detect_pdufa_changes(dry_run: bool = False) -> List[Dict]:
 
         # Save current snapshot
         if not dry_run:
-            save_snapshot("pdufa", pdufa_id, current_data)
+            save_snapshot("pdufa", pdufa_id, current_data, today)
 
     print(f"   Found {len(changes)} PDUFA changes")
     return changes
@@ -590,16 +597,14 @@ def detect_score_changes(dry_run: bool = False) -> List[Dict]:
     """Detect changes in epi_scores table."""
     print("\n📈 Detecting score changes...")
 
-    # Get current scores with drug names
-    result = supabase.table("epi_scores")\
-        .select("id, drug_id, indication_id, bio_score, chem_score, tractability_score, total_score")\
-        .execute()
+    today = date.today().isoformat()
 
-    scores = result.data or []
+    # Get current scores with drug names
+    scores = iter_rows(lambda: supabase.table("epi_scores")
+                       .select("id, drug_id, indication_id, bio_score, chem_score, tractability_score, total_score"))
 
     # Get drug names for display
-    drug_result = supabase.table("epi_drugs").select("id, name").execute()
-    drug_names = {str(d["id"]): d["name"] for d in (drug_result.data or [])}
+    drug_names = {str(d["id"]): d["name"] for d in iter_rows(lambda: supabase.table("epi_drugs").select("id, name"))}
 
     changes = []
 
@@ -616,7 +621,7 @@ def detect_score_changes(dry_run: bool = False) -> List[Dict]:
         }
 
         # Get previous snapshot
-        previous = get_previous_snapshot("score", score_id)
+        previous = get_previous_snapshot("score", score_id, today)
 
         if previous is not None:
             # Compare score fields
@@ -652,7 +657,7 @@ def detect_score_changes(dry_run: bool = False) -> List[Dict]:
 
         # Save current snapshot
         if not dry_run:
-            save_snapshot("score", score_id, current_data)
+            save_snapshot("score", score_id, current_data, today)
 
     print(f"   Found {len(changes)} score changes")
     return changes
@@ -22,6 +22,8 @@ from typing import Optional, Dict, List, Any
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from backend.etl.http_session import error_excerpt, make_session
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -34,6 +36,15 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# One keep-alive connection to Resend for the whole subscriber loop. The
+# adapter only retries connection errors for POSTs, so no email is sent twice.
+RESEND_API_URL = "https://api.resend.com/emails"
+_RESEND_SESSION = make_session(pool_size=1)
+_RESEND_SESSION.headers.update({
+    "Authorization": f"Bearer {RESEND_API_KEY}",
+    "Content-Type": "application/json"
+})
+
 
 # ============================================================
 # Email Template
@@ -508,14 +519,9 @@ def send_email_via_resend(
         return None
 
     try:
-        import requests
-
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {RESEND_API_KEY}",
-                "Content-Type": "application/json"
-            },
+        response = _RESEND_SESSION.post(
+            RESEND_API_URL,
+            timeout=30,
             json={
                 "from": "Phase4 Intelligence <digest@phase4.io>",
                 "to": [to_email],
@@ -533,7 +539,7 @@ def send_email_via_resend(
             data = response.json()
             return data.get("id")
         else:
-            print(f"   ❌ Resend error: {response.status_code} - {response.text}")
+            print(f"   ❌ Resend error: {response.status_code} - {error_excerpt(response)}")
             return None
 
     except Exception as e:
@@ -654,43 +660,44 @@ def log_digest_sent(
 
 def generate_sample_changes() -> List[Dict]:
     """Generate sample changes for preview mode when tables don't exist."""
+    detected_at = datetime.now().isoformat()
     return [
         {"id": "1", "entity_type": "drug", "entity_name": "TAZEMETOSTAT", "change_type": "approval",
          "field_changed": "fda_approved", "old_value": "false", "new_value": "true",
          "change_summary": "TAZEMETOSTAT: FDA approval granted", "significance": "critical",
-         "source": "fda", "source_url": "https://fda.gov/example", "detected_at": datetime.now().isoformat()},
+         "source": "fda", "source_url": "https://fda.gov/example", "detected_at": detected_at},
         {"id": "2", "entity_type": "drug", "entity_name": "GSK126", "change_type": "phase_change",
          "field_changed": "max_phase", "old_value": "2", "new_value": "3",
          "change_summary": "GSK126: Phase 2 → Phase 3", "significance": "critical",
-         "source": "ctgov", "source_url": "https://clinicaltrials.gov/study/NCT00000001", "detected_at": datetime.now().isoformat()},
+         "source": "ctgov", "source_url": "https://clinicaltrials.gov/study/NCT00000001", "detected_at": detected_at},
         {"id": "3", "entity_type": "news", "entity_name": "EZH2 inhibitor shows synergy with anti-PD1", "change_type": "new_entity",
          "field_changed": None, "old_value": None, "new_value": "epi_io",
          "change_summary": "📰 EZH2 inhibitor shows synergy with anti-PD1 in melanoma model", "significance": "high",
-         "source": "nature_cancer", "source_url": "https://nature.com/articles/example", "detected_at": datetime.now().isoformat()},
+         "source": "nature_cancer", "source_url": "https://nature.com/articles/example", "detected_at": detected_at},
         {"id": "4", "entity_type": "patent", "entity_name": "US12345678", "change_type": "new_entity",
          "field_changed": "category", "old_value": None, "new_value": "epi_editor",
          "change_summary": "📜 CRISPR-based epigenetic silencing of oncogenes [BRD4, MYC]", "significance": "high",
-         "source": "uspto", "source_url": "https://patents.google.com/patent/US12345678", "detected_at": datetime.now().isoformat()},
+         "source": "uspto", "source_url": "https://patents.google.com/patent/US12345678", "detected_at": detected_at},
         {"id": "5", "entity_type": "trial", "entity_name": "NCT05432101", "change_type": "status_change",
          "field_changed": "status", "old_value": "RECRUITING", "new_value": "COMPLETED",
          "change_summary": "NCT05432101: Trial completed", "significance": "medium",
-         "source": "ctgov", "source_url": "https://clinicaltrials.gov/study/NCT05432101", "detected_at": datetime.now().isoformat()},
+         "source": "ctgov", "source_url": "https://clinicaltrials.gov/study/NCT05432101", "detected_at": detected_at},
         {"id": "6", "entity_type": "trial", "entity_name": "NCT06123456", "change_type": "date_change",
          "field_changed": "primary_completion_date", "old_value": "2025-03-01", "new_value": "2025-06-01",
          "change_summary": "NCT06123456: Primary completion delayed to June 2025", "significance": "medium",
-         "source": "ctgov", "source_url": "https://clinicaltrials.gov/study/NCT06123456", "detected_at": datetime.now().isoformat()},
+         "source": "ctgov", "source_url": "https://clinicaltrials.gov/study/NCT06123456", "detected_at": detected_at},
         {"id": "7", "entity_type": "drug", "entity_name": "VORINOSTAT", "change_type": "score_change",
          "field_changed": "total_score", "old_value": "62", "new_value": "68",
          "change_summary": "VORINOSTAT: Total score increased by 6 points", "significance": "low",
-         "source": "etl", "source_url": None, "detected_at": datetime.now().isoformat()},
+         "source": "etl", "source_url": None, "detected_at": detected_at},
         {"id": "8", "entity_type": "pdufa", "entity_name": "Pelabresib (MOR)", "change_type": "new_entity",
          "field_changed": None, "old_value": None, "new_value": "2025-09-01",
          "change_summary": "📅 PDUFA Alert: Pelabresib (MOR) - Sept 1, 2025", "significance": "high",
-         "source": "pdufa_tracker", "source_url": "https://morphosys.com/pipeline/pelabresib", "detected_at": datetime.now().isoformat()},
+         "source": "pdufa_tracker", "source_url": "https://morphosys.com/pipeline/pelabresib", "detected_at": detected_at},
         {"id": "9", "entity_type": "pdufa", "entity_name": "Ziftomenib (KURA)", "change_type": "status_change",
          "field_changed": "status", "old_value": "pending", "new_value": "approved",
          "change_summary": "🎉 FDA APPROVED: Ziftomenib (KURA)", "significance": "critical",
-         "source": "fda_rss", "source_url": "https://fda.gov/drugs/approvals", "detected_at": datetime.now().isoformat()},
+         "source": "fda_rss", "source_url": "https://fda.gov/drugs/approvals", "detected_at": detected_at},
     ]
 
 
@@ -1,10 +1,224 @@
-import requests
+import hashlib
 import math
-import statistics
-from typing import Dict, List, Optional
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlencode
+
+import requests
+
+from backend.etl.http_session import AdaptiveRateLimiter, json_dumps, json_loads, make_session
 
 CHEMBL_API_URL = "https://www.ebi.ac.uk/chembl/api/data"
 
+# Reused across calls so the TLS connection to ebi.ac.uk stays alive
+_SESSION = make_session()
+
+# Shared by every thread hitting the ChEMBL API (cache hits are not throttled).
+# Starts at CHEMBL_MAX_RPS, halves whenever ChEMBL pushes back, recovers on success.
+# Up to a second's worth of idle capacity can be spent in a burst.
+CHEMBL_MAX_RPS = 10
+THROTTLE_STATUSES = (429, 503)
+_LIMITER = AdaptiveRateLimiter(CHEMBL_MAX_RPS, burst=CHEMBL_MAX_RPS)
+
+
+def configure_worker(max_rps: float) -> None:
+    """
+    Give a worker process its own session and a share of the request budget.
+
+    Use as a ProcessPoolExecutor initializer: connections and the limiter
+    are per process, so N workers at CHEMBL_MAX_RPS / N keep the total
+    within ChEMBL's limit.
+    """
+    global _SESSION, _LIMITER
+    _SESSION = make_session()
+    _LIMITER = AdaptiveRateLimiter(max_rps, burst=max(1.0, max_rps))
+
+
+def _throttled_get(url: str, **kwargs) -> requests.Response:
+    """
+    Rate-limited GET that feeds ChEMBL's pushback into the shared limiter.
+
+    The session already retries 429/503 (honouring Retry-After); any such
+    retry recorded on the response, or a request that failed after them,
+    backs the limiter off. A clean response lets it speed up again.
+    """
+    _LIMITER.wait()
+    try:
+        response = _SESSION.get(url, **kwargs)
+    except requests.exceptions.RetryError:
+        _LIMITER.backoff()
+        raise
+    retries = getattr(response.raw, "retries", None)
+    if response.status_code in THROTTLE_STATUSES or any(
+        r.status in THROTTLE_STATUSES for r in getattr(retries, "history", ())
+    ):
+        _LIMITER.backoff()
+    else:
+        _LIMITER.success()
+    return response
+
+# On-disk cache for reference lookups (molecule records, activity pages); ChEMBL
+# releases are months apart and stale entries are revalidated conditionally
+CACHE_DIR = Path(__file__).parent / ".cache" / "chembl"
+CACHE_TTL_SECONDS = 7 * 86400
+_cache_enabled = True
+_cache_first = False
+
+
+def set_cache_enabled(enabled: bool) -> None:
+    """Turn the on-disk ChEMBL cache on or off (e.g. for a --no-cache run)."""
+    global _cache_enabled
+    _cache_enabled = enabled
+
+
+def set_cache_first(enabled: bool) -> None:
+    """
+    Serve every cached entry regardless of age and only call the API for
+    misses (e.g. for a --cache-first re-run between ChEMBL releases).
+    """
+    global _cache_first
+    _cache_first = enabled
+
+
+def _cache_path(url: str) -> Path:
+    return CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+
+def _read_cache_entry(path: Path) -> Optional[Dict]:
+    """Load a cache entry ({"etag", "last_modified", "payload"}); None if missing or unreadable."""
+    try:
+        entry = json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None  # Missing or corrupt entry - refetch
+    return entry if isinstance(entry, dict) and "payload" in entry else None
+
+
+def _write_cache_entry(path: Path, entry: Dict) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(json_dumps(entry))
+    tmp.replace(path)
+
+
+def _get_json_cached(url: str, timeout: int = 30) -> Optional[Dict]:
+    """
+    GET a ChEMBL URL, memoised on disk for CACHE_TTL_SECONDS.
+
+    Once an entry is stale it is revalidated with If-None-Match /
+    If-Modified-Since; a 304 keeps the cached payload and resets its TTL.
+    Returns None on 404 (not cached, so new records are picked up).
+    """
+    path = _cache_path(url)
+    entry = _read_cache_entry(path) if _cache_enabled else None
+    if entry and (_cache_first or time.time() - path.stat().st_mtime < CACHE_TTL_SECONDS):
+        return entry["payload"]
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = _throttled_get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and entry:
+        path.touch()
+        return entry["payload"]
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    data = json_loads(response.content)
+
+    if _cache_enabled:
+        _write_cache_entry(path, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "payload": data,
+        })
+    return data
+
+
+def fetch_molecule(chembl_id: str) -> Optional[Dict]:
+    """Fetch a ChEMBL molecule record by ID (cached on disk). None if not found."""
+    return _get_json_cached(f"{CHEMBL_API_URL}/molecule/{chembl_id}.json")
+
+
+# Binding and functional assays only
+QUALITY_ASSAY_TYPES = frozenset({"B", "F"})
+
+
+# Background fetches for the next activity page, overlapping the network
+# round trip with processing of the current page
+_PREFETCH = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chembl-prefetch")
+
+# Upper bound on pages followed per molecule (1000 records per page)
+ACTIVITY_MAX_PAGES = 5
+
+# Activity fields the pipeline reads; ChEMBL returns ~45 per record otherwise
+ACTIVITY_FIELDS = (
+    "assay_type", "standard_type", "standard_value",
+    "target_chembl_id", "target_pref_name", "target_type",
+)
+
+
+def iter_activity_pages(chembl_molecule_id: str, limit: int = 1000,
+                        max_pages: Optional[int] = 1) -> Iterator[List[Dict]]:
+    """
+    Yield pages of nM Ki/Kd/IC50/EC50 activity records for a molecule (cached on disk).
+
+    Follows page_meta.next up to max_pages (None = all). The next page is
+    requested before the current one is yielded, so it downloads while the
+    caller works through the current page. Raises on HTTP errors.
+    """
+    params = {
+        "molecule_chembl_id": chembl_molecule_id,
+        "standard_type__in": "Ki,Kd,IC50,EC50",
+        "standard_units": "nM",
+        "only": ",".join(ACTIVITY_FIELDS),
+        "limit": limit,
+        "format": "json"
+    }
+    pending = _PREFETCH.submit(
+        _get_json_cached, f"{CHEMBL_API_URL}/activity?{urlencode(params)}", 60
+    )
+    pages = 0
+    while pending is not None:
+        data = pending.result()
+        pages += 1
+        if not data:
+            return
+        next_path = (data.get("page_meta") or {}).get("next")
+        pending = None
+        if next_path and (max_pages is None or pages < max_pages):
+            pending = _PREFETCH.submit(_get_json_cached, f"https://www.ebi.ac.uk{next_path}", 60)
+        yield data.get("activities", [])
+
+
+def fetch_activities(chembl_molecule_id: str, limit: int = 1000,
+                     max_pages: Optional[int] = 1) -> List[Dict]:
+    """
+    Fetch nM Ki/Kd/IC50/EC50 activity records for a molecule (cached on disk).
+    Raises on HTTP errors; [] if the molecule is unknown.
+    """
+    activities = []
+    for page in iter_activity_pages(chembl_molecule_id, limit, max_pages):
+        activities.extend(page)
+    return activities
+
+
+def pxc50(standard_value) -> Optional[float]:
+    """pXC50 = 9 - log10(nM) of a standard_value; None if missing, unparseable or <= 0."""
+    try:
+        val_nm = float(standard_value)
+    except (TypeError, ValueError):
+        return None
+    return 9 - math.log10(val_nm) if val_nm > 0 else None
+
+
 def fetch_chembl_activity(chembl_molecule_id: str, target_chembl_id: Optional[str] = None) -> Dict:
     """
     Fetch bioactivity data from ChEMBL for a given molecule.
@@ -15,71 +229,52 @@ def fetch_chembl_activity(chembl_molecule_id: str, target_chembl_id: Optional[st
     # API allows filtering by molecule_chembl_id and standard_type.
     # We will fetch all relevant types and filter in Python for flexibility.
     
-    url = f"{CHEMBL_API_URL}/activity"
-    params = {
-        "molecule_chembl_id": chembl_molecule_id,
-        "standard_type__in": "Ki,Kd,IC50,EC50",
-        "standard_units": "nM",
-        "limit": 1000, # Fetch reasonable amount
-        "format": "json"
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        activities = data.get("activities", [])
-    except Exception as e:
-        print(f"❌ Error fetching ChEMBL activities for {chembl_molecule_id}: {e}")
-        return {}
+    pages = iter_activity_pages(chembl_molecule_id, limit=1000, max_pages=ACTIVITY_MAX_PAGES)
 
+    # Only the primary set needs every value (for the median); off-target
+    # activity just feeds a running best
     primary_p_values = []
-    off_target_p_values = []
+    p_off_best = None
     
     n_primary = 0
     n_total = 0
 
-    for act in activities:
-        # Quality Filters
-        # Assay type: 'B' (Binding) or 'F' (Functional) usually preferred.
-        # ChEMBL API returns `assay_type`.
-        if act.get("assay_type") not in ["B", "F"]:
-            continue
-            
-        # Confidence Score (if available, usually mapped to `data_validity_comment` or similar in older versions, 
-        # but modern ChEMBL has `confidence_score` in some endpoints. 
-        # Let's check if `confidence_score` is present. If not, we skip strict check or rely on `standard_value`.
-        # Actually, `standard_value` must be present.
-        val = act.get("standard_value")
-        if not val:
-            continue
-            
-        try:
-            val_nm = float(val)
-        except:
-            continue
+    try:
+        for page in pages:
+            for act in page:
+                # Quality Filters
+                # Assay type: 'B' (Binding) or 'F' (Functional) usually preferred.
+                # ChEMBL API returns `assay_type`.
+                if act.get("assay_type") not in QUALITY_ASSAY_TYPES:
+                    continue
             
-        # Calculate pXC50
-        # pXC50 = 9 - log10(nM)
-        if val_nm <= 0: continue
-        p_val = 9 - math.log10(val_nm)
+                # Confidence Score (if available, usually mapped to `data_validity_comment` or similar in older versions, 
+                # but modern ChEMBL has `confidence_score` in some endpoints. 
+                # Let's check if `confidence_score` is present. If not, we skip strict check or rely on `standard_value`.
+                # Actually, `standard_value` must be present.
+                p_val = pxc50(act.get("standard_value"))
+                if p_val is None:
+                    continue
         
-        n_total += 1
+                n_total += 1
         
-        # Check if Primary or Off-Target
-        # We need the target_chembl_id of the activity
-        act_target_id = act.get("target_chembl_id")
-
-        if target_chembl_id is None:
-            # No specific target provided - use ALL activities for "best potency"
-            # This gives us the drug's overall best potency across all targets
-            primary_p_values.append(p_val)
-            n_primary += 1
-        elif act_target_id == target_chembl_id:
-            primary_p_values.append(p_val)
-            n_primary += 1
-        else:
-            off_target_p_values.append(p_val)
+                # Check if Primary or Off-Target
+                # We need the target_chembl_id of the activity
+                act_target_id = act.get("target_chembl_id")
+
+                if target_chembl_id is None:
+                    # No specific target provided - use ALL activities for "best potency"
+                    # This gives us the drug's overall best potency across all targets
+                    primary_p_values.append(p_val)
+                    n_primary += 1
+                elif act_target_id == target_chembl_id:
+                    primary_p_values.append(p_val)
+                    n_primary += 1
+                elif p_off_best is None or p_val > p_off_best:
+                    p_off_best = p_val
+    except Exception as e:
+        print(f"❌ Error fetching ChEMBL activities for {chembl_molecule_id}: {e}")
+        return {}
 
     # Compute Metrics
     metrics = {
@@ -87,16 +282,19 @@ def fetch_chembl_activity(chembl_molecule_id: str, target_chembl_id: Optional[st
         "n_activities_total": n_total,
         "p_act_median": None,
         "p_act_best": None,
-        "p_off_best": None,
+        "p_off_best": p_off_best,
         "delta_p": None
     }
     
     if primary_p_values:
-        metrics["p_act_median"] = statistics.median(primary_p_values)
-        metrics["p_act_best"] = max(primary_p_values)
-        
-    if off_target_p_values:
-        metrics["p_off_best"] = max(off_target_p_values)
+        # One in-place sort yields both the median and the best value
+        primary_p_values.sort()
+        n = len(primary_p_values)
+        mid = n // 2
+        metrics["p_act_median"] = (
+            primary_p_values[mid] if n % 2 else (primary_p_values[mid - 1] + primary_p_values[mid]) / 2
+        )
+        metrics["p_act_best"] = primary_p_values[-1]
         
     if metrics["p_act_best"] is not None and metrics["p_off_best"] is not None:
         metrics["delta_p"] = metrics["p_act_best"] - metrics["p_off_best"]
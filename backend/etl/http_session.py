@@ -0,0 +1,142 @@
+"""
+HTTP Session: Shared requests.Session factory for the ETL API clients.
+
+A module-level session keeps TCP/TLS connections alive between calls and
+retries throttled / transient failures with exponential backoff.
+
+Usage:
+    from backend.etl.http_session import RateLimiter, make_session
+
+    _SESSION = make_session()
+    _LIMITER = RateLimiter(2, burst=4)  # requests per second, shared across threads
+
+    _LIMITER.wait()
+    response = _SESSION.get(url, params=params, timeout=30)
+"""
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# orjson decodes large API payloads several times faster; optional.
+# json_dumps always returns UTF-8 bytes, ready for a request body or file.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def make_session(
+    pool_size: int = 32,
+    retries: int = 3,
+    backoff_factor: float = 0.5
+) -> requests.Session:
+    """
+    Build a requests.Session with a pooled, retrying adapter.
+
+    Args:
+        pool_size: Connections kept per host (>= number of worker threads)
+        retries: Total retries on connection errors and RETRY_STATUSES
+        backoff_factor: Exponential backoff base in seconds
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Advertise every encoding urllib3 can decode here: gzip and deflate,
+    # plus br / zstd when the optional brotli / zstandard packages are installed
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+# Bytes of an error body worth logging
+ERROR_EXCERPT_BYTES = 500
+
+
+def error_excerpt(response: requests.Response, limit: int = ERROR_EXCERPT_BYTES) -> str:
+    """
+    First `limit` bytes of a response body, decoded as UTF-8 for logging.
+
+    Unlike response.text this never decodes (or charset-sniffs) the whole
+    body, which can be a multi-MB HTML error page.
+    """
+    return response.content[:limit].decode("utf-8", errors="replace")
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` calls per second, bursts up to `burst`.
+
+    Idle time refills the bucket, so after a pause up to `burst` calls go
+    straight through; beyond that calls are spaced 1/rate seconds apart
+    (burst=1 is plain fixed spacing). Callers take a token under the lock
+    and sleep outside it, so waiting never blocks other callers from
+    reserving the following slots. Each sleep gets up to JITTER_SECONDS of
+    random jitter so workers queued together don't fire in lockstep.
+    """
+
+    JITTER_SECONDS = 0.01
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+            self._updated = now
+            # A negative balance is the queue of callers already waiting
+            self._tokens -= 1
+            delay = -self._tokens * self.interval
+        if delay > 0:
+            time.sleep(max(0.0, delay + random.uniform(-self.JITTER_SECONDS, self.JITTER_SECONDS)))
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """RateLimiter whose rate adapts to throttling (AIMD).
+
+    backoff() halves the rate after a 429/401 and success() creeps it back
+    up by 5% per call, never above the starting rate.
+    """
+
+    def __init__(self, rate: float, min_rate: float = 0.05, burst: float = 1.0):
+        super().__init__(rate, burst)
+        self.max_rate = rate
+        self.min_rate = min_rate
+
+    @property
+    def rate(self) -> float:
+        return 1.0 / self.interval
+
+    def backoff(self) -> None:
+        with self._lock:
+            self.interval = 1.0 / max(self.min_rate, self.rate * 0.5)
+
+    def success(self) -> None:
+        with self._lock:
+            self.interval = 1.0 / min(self.max_rate, self.rate * 1.05)
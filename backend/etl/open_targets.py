@@ -1,20 +1,55 @@
-import requests
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
 from typing import List, Dict
 
+from backend.etl.http_session import error_excerpt, json_dumps, json_loads, make_session
+
 OT_API_URL = "https://api.platform.opentargets.org/api/v4/graphql"
 
+# Keep-alive session shared by every query; OT compresses JSON responses
+_SESSION = make_session()
+_SESSION.headers["Content-Type"] = "application/json"
+
 def run_ot_query(query: str, variables: dict = None) -> dict:
     """Execute GraphQL query against Open Targets."""
-    response = requests.post(
+    response = _SESSION.post(
         OT_API_URL,
-        json={"query": query, "variables": variables or {}},
-        headers={"Content-Type": "application/json"}
+        data=json_dumps({"query": query, "variables": variables or {}}),
+        timeout=30
     )
     if response.status_code == 400:
         print(f"❌ GraphQL 400 Error. Query: {query} Variables: {variables}")
-        print(f"Response: {response.text}")
+        print(f"Response: {error_excerpt(response)}")
     response.raise_for_status()
-    return response.json()
+    return json_loads(response.content)
+
+# On-disk cache for release-scoped data that re-runs repeat verbatim (target
+# lookups, association scores, tractability). Open Targets releases
+# quarterly, so a month-old answer is still current.
+CACHE_DIR = Path(__file__).parent / ".cache" / "open_targets"
+CACHE_TTL_SECONDS = 30 * 86400
+
+def run_ot_query_cached(query: str, variables: dict = None) -> dict:
+    """run_ot_query, memoised on disk by (query, variables) for CACHE_TTL_SECONDS."""
+    key = json.dumps([query, variables or {}], sort_keys=True)
+    path = CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+    try:
+        if time.time() - path.stat().st_mtime < CACHE_TTL_SECONDS:
+            return json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        pass  # Missing or corrupt entry - refetch
+
+    result = run_ot_query(query, variables)
+    if not result.get("errors"):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(json_dumps(result))
+        tmp.replace(path)
+    return result
 
 def fetch_known_drugs_for_disease(efo_id: str) -> List[Dict]:
     """
@@ -112,7 +147,7 @@ def fetch_disease_targets_scores(efo_id: str) -> Dict[str, float]:
         if index > 20: 
             break
             
-        result = run_ot_query(query, {"efoId": efo_id, "index": index})
+        result = run_ot_query_cached(query, {"efoId": efo_id, "index": index})
         data = result["data"]["disease"]["associatedTargets"]
         
         if not data["rows"]:
@@ -125,6 +160,38 @@ def fetch_disease_targets_scores(efo_id: str) -> Dict[str, float]:
             
     return scores
 
+def fetch_disease_target_scores_for(efo_id: str, target_ids: List[str]) -> Dict[str, float]:
+    """
+    Overall association scores between a disease and the given targets only.
+    The Bs filter is applied server-side, so one small page replaces the
+    up-to-21 pages fetch_disease_targets_scores walks.
+    Returns dict: {target_id: score}; unassociated targets are omitted.
+    """
+    query = """
+    query DiseaseTargetsFor($efoId: String!, $targetIds: [String!]!, $size: Int!) {
+      disease(efoId: $efoId) {
+        associatedTargets(Bs: $targetIds, page: {size: $size, index: 0}) {
+          rows {
+            target {
+              id
+            }
+            score
+          }
+        }
+      }
+    }
+    """
+    if not target_ids:
+        return {}
+    target_ids = sorted(set(target_ids))
+    result = run_ot_query_cached(
+        query, {"efoId": efo_id, "targetIds": target_ids, "size": len(target_ids)}
+    )
+    disease = (result.get("data") or {}).get("disease")
+    if not disease:
+        return {}
+    return {row["target"]["id"]: row["score"] for row in disease["associatedTargets"]["rows"]}
+
 def fetch_target_details(target_id: str) -> Dict:
     """
     Fetch target UniProt/Ensembl IDs.
@@ -138,7 +205,7 @@ def fetch_target_details(target_id: str) -> Dict:
       }
     }
     """
-    result = run_ot_query(query, {"targetId": target_id})
+    result = run_ot_query_cached(query, {"targetId": target_id})
     return result["data"]["target"]
 
 def search_target_by_symbol(symbol: str) -> Dict:
@@ -161,7 +228,7 @@ def search_target_by_symbol(symbol: str) -> Dict:
       }
     }
     """
-    result = run_ot_query(query, {"queryString": symbol})
+    result = run_ot_query_cached(query, {"queryString": symbol})
     hits = result["data"]["search"]["hits"]
     
     if hits:
@@ -171,6 +238,116 @@ def search_target_by_symbol(symbol: str) -> Dict:
             return hit
     return None
 
+def search_target_with_uniprot(symbol: str) -> Dict:
+    """
+    search_target_by_symbol plus the UniProt accession, in one GraphQL call
+    instead of a search followed by a target lookup.
+    Returns {id, approvedSymbol, approvedName, uniprot_id} or None.
+    """
+    query = """
+    query SearchWithProteins($queryString: String!) {
+      search(queryString: $queryString, entityNames: ["target"], page: {size: 1, index: 0}) {
+        hits {
+          object {
+            ... on Target {
+              id
+              approvedSymbol
+              approvedName
+              proteinIds {
+                id
+                source
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+    result = run_ot_query_cached(query, {"queryString": symbol})
+    hits = result["data"]["search"]["hits"]
+    if not hits or hits[0]["object"]["approvedSymbol"].upper() != symbol.upper():
+        return None
+
+    hit = hits[0]["object"]
+    protein_ids = hit.pop("proteinIds", None) or []
+    # Prefer the reviewed Swiss-Prot entry over TrEMBL
+    uniprot = sorted(
+        (p for p in protein_ids if p.get("source", "").startswith("uniprot")),
+        key=lambda p: p["source"] != "uniprot_swissprot"
+    )
+    hit["uniprot_id"] = uniprot[0]["id"] if uniprot else None
+    return hit
+
+def search_target_with_disease_associations(symbol: str, size: int = 50) -> Dict:
+    """
+    search_target_by_symbol plus the target's top `size` disease associations,
+    in one GraphQL call instead of a search followed by an associations query.
+    Returns {id, approvedSymbol, approvedName, associations: [{disease: {id, name}, score}]}
+    or None.
+    """
+    query = """
+    query SearchWithDiseases($queryString: String!, $size: Int!) {
+      search(queryString: $queryString, entityNames: ["target"], page: {size: 1, index: 0}) {
+        hits {
+          object {
+            ... on Target {
+              id
+              approvedSymbol
+              approvedName
+              associatedDiseases(page: {size: $size, index: 0}) {
+                rows {
+                  disease {
+                    id
+                    name
+                  }
+                  score
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+    result = run_ot_query_cached(query, {"queryString": symbol, "size": size})
+    hits = result["data"]["search"]["hits"]
+    if not hits or hits[0]["object"]["approvedSymbol"].upper() != symbol.upper():
+        return None
+
+    hit = hits[0]["object"]
+    hit["associations"] = (hit.pop("associatedDiseases", None) or {}).get("rows") or []
+    return hit
+
+# Symbol searches bundled into one GraphQL request via aliases
+SEARCH_BATCH_SIZE = 50
+
+def search_targets_by_symbols(symbols: List[str]) -> Dict[str, Dict]:
+    """
+    Batch form of search_target_by_symbol: one GraphQL call per
+    SEARCH_BATCH_SIZE symbols, each search aliased as s0, s1, ...
+    Returns dict: {symbol: {id, approvedSymbol, approvedName}} for exact
+    symbol matches only; unmatched symbols are omitted.
+    """
+    matches = {}
+    for start in range(0, len(symbols), SEARCH_BATCH_SIZE):
+        batch = symbols[start:start + SEARCH_BATCH_SIZE]
+        params = ", ".join(f"$q{i}: String!" for i in range(len(batch)))
+        fields = "\n".join(
+            f"""s{i}: search(queryString: $q{i}, entityNames: ["target"], page: {{size: 1, index: 0}}) {{
+              hits {{ object {{ ... on Target {{ id approvedSymbol approvedName }} }} }}
+            }}"""
+            for i in range(len(batch))
+        )
+        query = f"query SearchBatch({params}) {{\n{fields}\n}}"
+        result = run_ot_query_cached(query, {f"q{i}": symbol for i, symbol in enumerate(batch)})
+        data = result.get("data") or {}
+
+        for i, symbol in enumerate(batch):
+            hits = (data.get(f"s{i}") or {}).get("hits") or []
+            if hits and hits[0]["object"].get("approvedSymbol", "").upper() == symbol.upper():
+                matches[symbol] = hits[0]["object"]
+    return matches
+
 def fetch_known_drugs_for_target(target_id: str) -> List[Dict]:
     """
     Fetch all known drugs for a target.
@@ -234,7 +411,7 @@ def fetch_tractability(target_id: str) -> List[Dict]:
     }
     """
     try:
-        result = run_ot_query(query, {"targetId": target_id})
+        result = run_ot_query_cached(query, {"targetId": target_id})
         if result.get("data", {}).get("target"):
             return result["data"]["target"].get("tractability", [])
         return []
@@ -242,3 +419,31 @@ def fetch_tractability(target_id: str) -> List[Dict]:
         print(f"Error fetching tractability for {target_id}: {e}")
         return []
 
+def fetch_tractability_batch(target_ids: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Fetch tractability for many targets in a single GraphQL call.
+    Returns dict: {target_id: [{label, modality, value}, ...]}.
+    Targets missing from the response map to [].
+    """
+    query = """
+    query TargetsTractability($targetIds: [String!]!) {
+      targets(ensemblIds: $targetIds) {
+        id
+        tractability {
+          label
+          modality
+          value
+        }
+      }
+    }
+    """
+    tractability = {target_id: [] for target_id in target_ids}
+    if not target_ids:
+        return tractability
+    try:
+        result = run_ot_query_cached(query, {"targetIds": list(target_ids)})
+        for target in (result.get("data") or {}).get("targets") or []:
+            tractability[target["id"]] = target.get("tractability") or []
+    except Exception as e:
+        print(f"Error fetching tractability for {len(target_ids)} targets: {e}")
+    return tractability
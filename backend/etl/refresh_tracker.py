@@ -7,19 +7,82 @@ Usage:
     # Log a refresh
     log_refresh('target', target_id, 'open_targets', records_found=15)
 
+    # Inside a per-entity loop, bind the run context once
+    log = bind_refresh_logger('target', 'open_targets')
+    for target_id in target_ids:
+        log(target_id, records_found=15)
+
     # Find entities that haven't been refreshed in 30 days
     stale = get_stale_entities('target', 'open_targets', days=30)
 """
 import sys
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
 from backend.etl.supabase_client import supabase
 
 
+def _refresh_column(api_source: str) -> str:
+    """Name of the last-refresh timestamp column for an API source."""
+    return f'last_{api_source.replace("open_targets", "ot")}_refresh'
+
+
+def bind_refresh_logger(entity_type: str, api_source: str) -> Callable[..., None]:
+    """
+    Bind the run-level context (entity type, API source) once and return a
+    logger that only takes the per-entity fields.
+
+    Use this inside per-entity loops so the table/column names and the
+    constant part of the log row are not rebuilt for every entity. The
+    refresh timestamp is also taken once here, so every entity refreshed
+    through one logger carries the same last-refresh value.
+
+    Args:
+        entity_type: 'target', 'drug', or 'indication'
+        api_source: 'open_targets', 'chembl', 'clinicaltrials'
+
+    Returns:
+        log(entity_id, records_found=0, status='success', error_message=None)
+    """
+    table_name = f'epi_{entity_type}s'
+    column_name = _refresh_column(api_source)
+    context = {'entity_type': entity_type, 'api_source': api_source}
+    refreshed_at = datetime.now(timezone.utc).isoformat()
+
+    def log(
+        entity_id: str,
+        records_found: int = 0,
+        status: str = 'success',
+        error_message: Optional[str] = None
+    ) -> None:
+        # Insert into refresh log
+        try:
+            supabase.table('etl_refresh_log').insert({
+                **context,
+                'entity_id': entity_id,
+                'records_found': records_found,
+                'status': status,
+                'error_message': error_message
+            }).execute()
+        except Exception as e:
+            # Table may not exist yet - that's OK
+            print(f"  Note: Could not log to etl_refresh_log: {e}")
+
+        # Update entity's last refresh timestamp
+        try:
+            supabase.table(table_name).update({
+                column_name: refreshed_at
+            }).eq('id', entity_id).execute()
+        except Exception as e:
+            # Column may not exist yet - that's OK
+            pass
+
+    return log
+
+
 def log_refresh(
     entity_type: str,
     entity_id: str,
@@ -31,6 +94,8 @@ def log_refresh(
     """
     Log a refresh event and update the entity's last_refresh timestamp.
 
+    For loops over many entities, prefer bind_refresh_logger().
+
     Args:
         entity_type: 'target', 'drug', or 'indication'
         entity_id: UUID of the entity
@@ -39,31 +104,12 @@ def log_refresh(
         status: 'success', 'error', 'no_data'
         error_message: Error details if status is 'error'
     """
-    # Insert into refresh log
-    try:
-        supabase.table('etl_refresh_log').insert({
-            'entity_type': entity_type,
-            'entity_id': entity_id,
-            'api_source': api_source,
-            'records_found': records_found,
-            'status': status,
-            'error_message': error_message
-        }).execute()
-    except Exception as e:
-        # Table may not exist yet - that's OK
-        print(f"  Note: Could not log to etl_refresh_log: {e}")
-
-    # Update entity's last refresh timestamp
-    table_name = f'epi_{entity_type}s'
-    column_name = f'last_{api_source.replace("open_targets", "ot")}_refresh'
-
-    try:
-        supabase.table(table_name).update({
-            column_name: datetime.now(timezone.utc).isoformat()
-        }).eq('id', entity_id).execute()
-    except Exception as e:
-        # Column may not exist yet - that's OK
-        pass
+    bind_refresh_logger(entity_type, api_source)(
+        entity_id,
+        records_found=records_found,
+        status=status,
+        error_message=error_message
+    )
 
 
 def get_stale_entities(
@@ -83,7 +129,7 @@ def get_stale_entities(
         List of stale entities with their IDs and last refresh dates
     """
     table_name = f'epi_{entity_type}s'
-    column_name = f'last_{api_source.replace("open_targets", "ot")}_refresh'
+    column_name = _refresh_column(api_source)
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
 
     try:
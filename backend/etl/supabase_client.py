@@ -1,9 +1,35 @@
-from supabase import create_client, Client
+from supabase import ClientOptions, create_client, Client
 import os
+from functools import lru_cache
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Bulk upserts of BULK_CHUNK_SIZE rows can run long; fail instead of hanging
+POSTGREST_TIMEOUT_SECONDS = 60
+
+
+@lru_cache(maxsize=None)
+def get_client(url: str, key: str) -> Client:
+    """
+    Return a Supabase client for (url, key), created once per process.
+
+    The project URL is reduced to scheme://host[:port] with urlsplit, so a
+    trailing slash or path in SUPABASE_URL doesn't end up in the REST base.
+    Every caller shares the client's PostgREST connection pool, so requests
+    reuse kept-alive connections. Service-key clients have no user session
+    to persist or refresh.
+    """
+    parts = urlsplit(url.strip())
+    options = ClientOptions(
+        postgrest_client_timeout=POSTGREST_TIMEOUT_SECONDS,
+        auto_refresh_token=False,
+        persist_session=False,
+    )
+    return create_client(f"{parts.scheme}://{parts.netloc}", key, options=options)
+
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
@@ -12,7 +38,42 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     print("Warning: SUPABASE_URL or SUPABASE_SERVICE_KEY not set.")
     supabase = None
 else:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase: Client = get_client(SUPABASE_URL, SUPABASE_KEY)
+
+# PostgREST accepts array payloads; keep each request comfortably small.
+BULK_CHUNK_SIZE = 500
+
+def _chunked(items: list, size: int = BULK_CHUNK_SIZE):
+    """Yield successive slices of `items` of at most `size` elements."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+# PostgREST caps each response (1000 rows by default); page past it explicitly.
+PAGE_SIZE = 1000
+
+def iter_rows(build_query, page_size: int = PAGE_SIZE, key: str = "id"):
+    """
+    Yield every row of a select, fetching one page at a time.
+
+    Pages by keyset on `key` (which must be selected and unique) rather than
+    OFFSET, so each page is an index range scan instead of re-reading every
+    earlier row. `build_query` returns a fresh, unordered, filtered builder
+    per page. Callers can start on the first page before the rest arrive.
+    """
+    last = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = query.gt(key, last)
+        page = query.order(key).limit(page_size).execute().data
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1][key]
+
+def fetch_all_rows(build_query, page_size: int = PAGE_SIZE, key: str = "id") -> list:
+    """Run a select page by page (see iter_rows), return all rows."""
+    return list(iter_rows(build_query, page_size, key))
 
 def upsert_epi_target(data: dict) -> str:
     """Insert or update epi_target, return id."""
@@ -51,36 +112,40 @@ def upsert_epi_drug(data: dict) -> str:
         result = supabase.table("epi_drugs").insert(data).execute()
         return result.data[0]["id"]
 
-def insert_epi_drug_target(data: dict):
-    if not supabase: return
-    # Check if exists to avoid duplicates
-    existing = supabase.table("epi_drug_targets").select("id")\
-        .eq("drug_id", data["drug_id"])\
-        .eq("target_id", data["target_id"]).execute()
-    if not existing.data:
-        supabase.table("epi_drug_targets").insert(data).execute()
+def insert_epi_drug_target(data: dict) -> bool:
+    """Link a drug to a target unless already linked. Returns True if a new link was made."""
+    if not supabase: return False
+    # One round trip; existing (drug_id, target_id) links are left untouched
+    result = supabase.table("epi_drug_targets").upsert(
+        data, on_conflict="drug_id,target_id", ignore_duplicates=True
+    ).execute()
+    return bool(result.data)
+
+# Indication ids resolved so far this process, keyed by ("efo_id"|"name", value);
+# seed scripts hit the same few indications from many drugs/combos
+_indication_ids = {}
 
 def insert_epi_indication(data: dict) -> str:
     if not supabase: return None
     # Match on name or efo_id
-    if data.get("efo_id"):
-        existing = supabase.table("epi_indications").select("id").eq("efo_id", data["efo_id"]).execute()
-    else:
-        existing = supabase.table("epi_indications").select("id").eq("name", data["name"]).execute()
-        
+    key = ("efo_id", data["efo_id"]) if data.get("efo_id") else ("name", data["name"])
+    if key in _indication_ids:
+        return _indication_ids[key]
+
+    existing = supabase.table("epi_indications").select("id").eq(*key).execute()
     if existing.data:
-        return existing.data[0]["id"]
+        indication_id = existing.data[0]["id"]
     else:
         result = supabase.table("epi_indications").insert(data).execute()
-        return result.data[0]["id"]
+        indication_id = result.data[0]["id"]
+    _indication_ids[key] = indication_id
+    return indication_id
 
 def insert_epi_drug_indication(data: dict):
     if not supabase: return
-    existing = supabase.table("epi_drug_indications").select("id")\
-        .eq("drug_id", data["drug_id"])\
-        .eq("indication_id", data["indication_id"]).execute()
-    if not existing.data:
-        supabase.table("epi_drug_indications").insert(data).execute()
+    supabase.table("epi_drug_indications").upsert(
+        data, on_conflict="drug_id,indication_id", ignore_duplicates=True
+    ).execute()
 
 def upsert_epi_scores(data: dict):
     if not supabase: return
@@ -93,6 +158,16 @@ def upsert_epi_scores(data: dict):
     else:
         supabase.table("epi_scores").insert(data).execute()
 
+def update_epi_scores(rows: list) -> int:
+    """
+    Bulk update existing epi_scores rows, return the number written.
+    Each row needs "id", "drug_id" and "indication_id" plus the columns to change.
+    """
+    if not supabase or not rows: return 0
+    for chunk in _chunked(rows):
+        supabase.table("epi_scores").upsert(chunk, on_conflict="id").execute()
+    return len(rows)
+
 def upsert_epi_signature(data: dict) -> str:
     if not supabase: return None
     existing = supabase.table("epi_signatures").select("id").eq("name", data["name"]).execute()
@@ -111,15 +186,28 @@ def insert_epi_signature_target(data: dict):
     if not existing.data:
         supabase.table("epi_signature_targets").insert(data).execute()
 
-def upsert_chembl_metrics(data: dict):
-    """Insert or update chembl_metrics, matching on drug_id."""
-    if not supabase: return
-    existing = supabase.table("chembl_metrics").select("id")\
-        .eq("drug_id", data["drug_id"]).execute()
-    if existing.data:
-        supabase.table("chembl_metrics").update(data).eq("id", existing.data[0]["id"]).execute()
-    else:
-        supabase.table("chembl_metrics").insert(data).execute()
+def upsert_chembl_metrics(rows: list) -> int:
+    """
+    Bulk insert or update chembl_metrics matched on drug_id, return the
+    number of rows written.
+
+    One select for the existing drug_ids, then chunked writes for updates
+    and inserts (drug_id has no unique constraint to upsert against).
+    """
+    if not supabase or not rows: return 0
+    rows = list({r["drug_id"]: r for r in rows}.values())
+    ids = {}
+    for chunk in _chunked([r["drug_id"] for r in rows]):
+        existing = supabase.table("chembl_metrics").select("id, drug_id").in_("drug_id", chunk).execute()
+        ids.update({m["drug_id"]: m["id"] for m in existing.data})
+
+    updates = [{**r, "id": ids[r["drug_id"]]} for r in rows if r["drug_id"] in ids]
+    inserts = [r for r in rows if r["drug_id"] not in ids]
+    for chunk in _chunked(updates):
+        supabase.table("chembl_metrics").upsert(chunk, on_conflict="id").execute()
+    for chunk in _chunked(inserts):
+        supabase.table("chembl_metrics").insert(chunk).execute()
+    return len(rows)
 
 # ============================================================
 # Epigenetic Editing Asset Functions
@@ -200,6 +288,39 @@ def upsert_company(data: dict) -> str:
         result = supabase.table("epi_companies").insert(data).execute()
         return result.data[0]["id"]
 
+def upsert_companies(rows: list) -> dict:
+    """
+    Bulk insert or update epi_companies matched on name, return {name: id}.
+
+    One select for the existing names, then one upsert for the existing rows
+    and one insert for the new ones (chunked), instead of a select plus a
+    write per company.
+    """
+    if not supabase or not rows: return {}
+    ids = {}
+    for chunk in _chunked([r["name"] for r in rows]):
+        existing = supabase.table("epi_companies").select("id, name").in_("name", chunk).execute()
+        ids.update({c["name"]: c["id"] for c in existing.data})
+
+    updates = [{**r, "id": ids[r["name"]]} for r in rows if r["name"] in ids]
+    inserts = [r for r in rows if r["name"] not in ids]
+    for chunk in _chunked(updates):
+        supabase.table("epi_companies").upsert(chunk, on_conflict="id").execute()
+    for chunk in _chunked(inserts):
+        result = supabase.table("epi_companies").insert(chunk).execute()
+        ids.update({c["name"]: c["id"] for c in result.data})
+    return ids
+
+def update_companies(rows: list) -> int:
+    """
+    Bulk update existing epi_companies rows, return the number written.
+    Each row needs "id" and "name" (NOT NULL) plus the columns to change.
+    """
+    if not supabase or not rows: return 0
+    for chunk in _chunked(rows):
+        supabase.table("epi_companies").upsert(chunk, on_conflict="id").execute()
+    return len(rows)
+
 def get_company_by_name(name: str):
     """Get company by name."""
     if not supabase: return None
@@ -227,6 +348,28 @@ def insert_drug_company(data: dict):
     if not existing.data:
         supabase.table("epi_drug_companies").insert(data).execute()
 
+def _insert_missing_links(table: str, left: str, right: str, rows: list) -> int:
+    """
+    Insert the (left, right) link rows not already in `table`, return the
+    number inserted. One paged select per chunk of `right` ids finds the
+    existing pairs, instead of a select per link.
+    """
+    if not supabase or not rows: return 0
+    rows = list({(r[left], r[right]): r for r in rows}.values())
+    existing = set()
+    for chunk in _chunked(sorted({r[right] for r in rows})):
+        for link in iter_rows(lambda: supabase.table(table).select(f"id, {left}, {right}").in_(right, chunk)):
+            existing.add((link[left], link[right]))
+
+    inserts = [r for r in rows if (r[left], r[right]) not in existing]
+    for chunk in _chunked(inserts):
+        supabase.table(table).insert(chunk).execute()
+    return len(inserts)
+
+def insert_drug_companies(rows: list) -> int:
+    """Bulk form of insert_drug_company; return the number of new links."""
+    return _insert_missing_links("epi_drug_companies", "drug_id", "company_id", rows)
+
 def get_drug_by_name(name: str):
     """Get drug by name (case insensitive)."""
     if not supabase: return None
@@ -248,6 +391,10 @@ def insert_editing_asset_company(data: dict):
     if not existing.data:
         supabase.table("epi_editing_asset_companies").insert(data).execute()
 
+def insert_editing_asset_companies(rows: list) -> int:
+    """Bulk form of insert_editing_asset_company; return the number of new links."""
+    return _insert_missing_links("epi_editing_asset_companies", "editing_asset_id", "company_id", rows)
+
 def get_editing_asset_by_sponsor(sponsor: str):
     """Get editing assets by sponsor name."""
     if not supabase: return []
@@ -255,13 +402,27 @@ def get_editing_asset_by_sponsor(sponsor: str):
 
 def get_all_drug_indications():
     if not supabase: return []
-    # Join with drugs to get drug name if needed, but IDs are enough
-    return supabase.table("epi_drug_indications").select("*").execute().data
+    # Embed the indication's EFO ID so callers don't look it up per pair
+    return supabase.table("epi_drug_indications").select("*, epi_indications(efo_id)").execute().data
 
 def get_drug_targets(drug_id: str):
     if not supabase: return []
     return supabase.table("epi_drug_targets").select("target_id, is_primary_target").eq("drug_id", drug_id).execute().data
 
+def get_drug_target_infos(drug_id: str) -> list:
+    """
+    A drug's targets as epi_targets rows ({ot_target_id, symbol}), one per
+    unique target, from one embedded select instead of a lookup per target.
+    """
+    if not supabase: return []
+    rows = supabase.table("epi_drug_targets").select("target_id, epi_targets(ot_target_id, symbol)")\
+        .eq("drug_id", drug_id).execute().data
+    infos = {}
+    for row in rows:
+        if row.get("epi_targets"):
+            infos.setdefault(row["target_id"], row["epi_targets"])
+    return list(infos.values())
+
 def get_epi_target(target_id: str):
     if not supabase: return None
     return supabase.table("epi_targets").select("ot_target_id, symbol").eq("id", target_id).single().execute().data
@@ -305,3 +466,34 @@ def get_all_combos():
     if not supabase: return []
     return supabase.table("epi_combos").select("*, epi_drugs!epi_combos_epi_drug_id_fkey(*), epi_indications(*)").execute().data
 
+# ============================================================
+# Patent Functions
+# ============================================================
+
+def upsert_patents(rows: list) -> int:
+    """
+    Bulk insert or update epi_patents matched on patent_number (UNIQUE),
+    return the number of rows written. Duplicate patent numbers keep the
+    last row, since one upsert statement cannot touch a row twice.
+    """
+    if not supabase or not rows: return 0
+    unique = list({r["patent_number"]: r for r in rows}.values())
+    for chunk in _chunked(unique):
+        supabase.table("epi_patents").upsert(chunk, on_conflict="patent_number").execute()
+    return len(unique)
+
+def upsert_drug_candidates(rows: list) -> int:
+    """
+    Bulk insert or update epi_drug_candidates on its
+    (ot_drug_id, ot_target_id, indication_efo_id) key, return the number of
+    rows written. Duplicate keys keep the last row.
+    """
+    if not supabase or not rows: return 0
+    unique = list({
+        (r["ot_drug_id"], r["ot_target_id"], r.get("indication_efo_id")): r for r in rows
+    }.values())
+    for chunk in _chunked(unique):
+        supabase.table("epi_drug_candidates").upsert(
+            chunk, on_conflict="ot_drug_id,ot_target_id,indication_efo_id"
+        ).execute()
+    return len(unique)
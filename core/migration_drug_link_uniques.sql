@@ -0,0 +1,22 @@
+-- Migration: Unique link keys for epi_drug_targets / epi_drug_indications
+-- Purpose: Let the ETL write links with a single idempotent upsert
+--          (ON CONFLICT DO NOTHING) instead of select-then-insert
+
+-- Drop duplicate links first, keeping the oldest physical row
+DELETE FROM epi_drug_targets a
+USING epi_drug_targets b
+WHERE a.drug_id = b.drug_id
+  AND a.target_id = b.target_id
+  AND a.ctid > b.ctid;
+
+DELETE FROM epi_drug_indications a
+USING epi_drug_indications b
+WHERE a.drug_id = b.drug_id
+  AND a.indication_id = b.indication_id
+  AND a.ctid > b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_epi_drug_targets_drug_target
+    ON epi_drug_targets(drug_id, target_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_epi_drug_indications_drug_indication
+    ON epi_drug_indications(drug_id, indication_id);
@@ -13,12 +13,18 @@ url = os.environ.get('SUPABASE_URL')
 key = os.environ.get('SUPABASE_SERVICE_KEY') or os.environ.get('SUPABASE_KEY')
 client = create_client(url, key)
 
-# Count by phase
-result = client.from_('ci_trial_calendar').select('phase').execute()
+# One pass over the three count columns instead of a full select per breakdown
+result = client.from_('ci_trial_calendar').select('phase,status,drug_name').execute()
 phases = {}
+statuses = {}
+drugs = {}
 for r in result.data:
     p = r['phase'] or 'Unknown'
     phases[p] = phases.get(p, 0) + 1
+    s = r['status'] or 'Unknown'
+    statuses[s] = statuses.get(s, 0) + 1
+    d = r['drug_name'] or 'Unknown'
+    drugs[d] = drugs.get(d, 0) + 1
 
 print('=== TRIAL CALENDAR SUMMARY ===')
 print(f'Total trials: {len(result.data)}')
@@ -27,25 +33,11 @@ print('By Phase:')
 for phase, count in sorted(phases.items(), key=lambda x: -x[1]):
     print(f'  {phase}: {count}')
 
-# Count by status
-result2 = client.from_('ci_trial_calendar').select('status').execute()
-statuses = {}
-for r in result2.data:
-    s = r['status'] or 'Unknown'
-    statuses[s] = statuses.get(s, 0) + 1
-
 print()
 print('By Status:')
 for status, count in sorted(statuses.items(), key=lambda x: -x[1]):
     print(f'  {status}: {count}')
 
-# Count by drug
-result_drugs = client.from_('ci_trial_calendar').select('drug_name').execute()
-drugs = {}
-for r in result_drugs.data:
-    d = r['drug_name'] or 'Unknown'
-    drugs[d] = drugs.get(d, 0) + 1
-
 print()
 print('Top 10 Drugs by Trial Count:')
 for drug, count in sorted(drugs.items(), key=lambda x: -x[1])[:10]: